@@ -124,6 +124,7 @@ APP_RATE_LIMIT_CHAT_PER_MIN = max(1, _int_env("APP_RATE_LIMIT_CHAT_PER_MIN", 30)
 APP_RATE_LIMIT_ADMIN_PER_MIN = max(1, _int_env("APP_RATE_LIMIT_ADMIN_PER_MIN", 20))
 APP_MAX_CONCURRENT_CHAT = max(1, _int_env("APP_MAX_CONCURRENT_CHAT", 3))
 APP_CHAT_REQUEST_TIMEOUT_SECONDS = max(5, _int_env("APP_CHAT_REQUEST_TIMEOUT_SECONDS", 60))
+CHAT_WS_IDLE_TIMEOUT_SECONDS = 120
 OLLAMA_URL = _str_env("OLLAMA_URL", "http://127.0.0.1:11434")
 OLLAMA_MODEL = _model_env("OLLAMA_MODEL", "llama3.2:1b")
 ANTHROPIC_MODEL = _model_env("ANTHROPIC_MODEL", "claude-3-5-haiku-20241022")
@@ -2478,6 +2479,12 @@ HTML = f"""<!doctype html>
         background: #fff;
         padding: 10px;
       }}
+      .agent-trace-list > .agent-step {{
+        /* Steps scrolled out of the panel skip layout/paint; large traces stay cheap to open. */
+        contain: layout style;
+        content-visibility: auto;
+        contain-intrinsic-size: auto 200px;
+      }}
       .agent-step-head {{
         display: flex;
         justify-content: space-between;
@@ -5411,6 +5418,11 @@ HTML = f"""<!doctype html>
       let lastSelectedProvider = "ollama";
       let lastChatMode = "single";
       let lastAgentTrace = [];
+      let inspectorNodes = new Map();
+      let agentTraceNodes = new Map();
+      let pendingInspectorSections = null;
+      let pendingAgentTraceItems = null;
+      const agentTraceDetailCache = new WeakMap();
       let conversation = [];
       let pendingAttachments = [];
       let clientConversationId = (window.crypto && window.crypto.randomUUID)
@@ -5426,12 +5438,34 @@ HTML = f"""<!doctype html>
       let httpTraceExpanded = false;
       let agentTraceExpanded = false;
       let inspectorExpanded = false;
+      let statusClearTimer = 0;
       let flowGraphState = null;
       let flowGraphDragState = null;
+      let flowDragRaf = 0;
+      let flowHoverEl = null;
+      let flowTooltipSize = null;
+      let flowTooltipPointer = null;
+      let flowTooltipRaf = 0;
+      const flowTooltipTextCache = new WeakMap();
+      // Retained SVG elements for the flow graph, keyed by node id / edge index / boundary id.
+      // Built on first draw and patched in place afterwards; cleared by resetFlowGraph().
+      let flowGraphDom = null;
       let latestTraceEntry = null;
+      let traceViewsRenderRaf = 0;
+      let flowExplainOpen = false;
+      const TRACE_HISTORY_LIMIT = 200;
       let traceHistory = [];
       let selectedTraceIndex = -1;
       let thinkingTimer = null;
+      let conversationRenderRaf = 0;
+      const thinkingPhrasesCache = new Map();
+      let renderedAttachmentLabels = null;
+      let chatSocket = null;
+      let chatSocketIdleTimer = null;
+      const CHAT_SOCKET_IDLE_MS = 30000;
+      let renderedPresetCatalogKey = "";
+      let renderedConversation = [];
+      let pendingRowEl = null;
       let lastScenarioRunnerReport = null;
       let thinkingStartedAt = 0;
       let pendingAssistantText = "";
@@ -5537,6 +5571,19 @@ HTML = f"""<!doctype html>
       ]);
       const ATTACH_ACCEPT_TEXT_ONLY = ".txt,.md,.json,.csv,.log,.py,.js,.ts,.yaml,.yml";
       const ATTACH_ACCEPT_WITH_IMAGES = `image/*,${{ATTACH_ACCEPT_TEXT_ONLY}}`;
+      const OLLAMA_VISION_MODEL_TOKENS = [
+        "llava",
+        "bakllava",
+        "vision",
+        "moondream",
+        "qwen2-vl",
+        "qwen2.5-vl",
+        "minicpm-v",
+        "gemma3",
+        "phi-3-vision",
+        "llama3.2-vision",
+      ];
+      let ollamaVisionSupportCache = {{ model: null, allowImages: false }};
       const SCENARIO_SUITE = [
         {{ key: "hello", prompt: "Say hello in one sentence." }},
         {{ key: "secret_block", prompt: "I have yubi key ya29.a0AfH6SMBbCdEf123GhIjKlMnOpqrstuvWXyZ" }},
@@ -5678,6 +5725,20 @@ HTML = f"""<!doctype html>
         }}
       }}
 
+      const prettyCache = new WeakMap();
+
+      function prettyCached(obj) {{
+        // Trace payloads are never mutated after they arrive, so the serialized form can be
+        // kept for as long as the object itself is reachable (e.g. from traceHistory).
+        if (!obj || typeof obj !== "object") return pretty(obj);
+        let text = prettyCache.get(obj);
+        if (text === undefined) {{
+          text = pretty(obj);
+          prettyCache.set(obj, text);
+        }}
+        return text;
+      }}
+
       function settingsChevronIcon(expanded) {{
         return expanded
           ? '<svg viewBox="0 0 16 16" aria-hidden="true"><path d="M3.2 5.5 8 10.3l4.8-4.8 1.2 1.2L8 12.7 2 6.7z"/></svg>'
@@ -5823,11 +5884,7 @@ HTML = f"""<!doctype html>
       }}
 
       function _escapeAttr(v) {{
-        return String(v ?? "")
-          .replaceAll("&", "&amp;")
-          .replaceAll('"', "&quot;")
-          .replaceAll("<", "&lt;")
-          .replaceAll(">", "&gt;");
+        return escapeHtml(v ?? "");
       }}
 
       function _settingsFieldType(item) {{
@@ -6296,8 +6353,7 @@ HTML = f"""<!doctype html>
           settingsStatusTextEl.textContent = "Saved to .env.local";
           settingsFootNoteEl.textContent = "Saved locally. Restart app to ensure all provider credentials/base URLs are reloaded.";
           refreshCurrentModelText();
-          refreshOllamaStatus();
-          refreshLiteLlmStatus();
+          refreshProviderStatuses();
           refreshUpdateStatus();
           if (data.restart_recommended && nonThemeChangedKeys.length > 0) {{
             const shouldRestart = await showRestartConfirmModal();
@@ -6411,6 +6467,17 @@ HTML = f"""<!doctype html>
         }}
       }}
 
+      function _ollamaModelSupportsImages(model) {{
+        const key = String(model || "").toLowerCase();
+        if (ollamaVisionSupportCache.model !== key) {{
+          ollamaVisionSupportCache = {{
+            model: key,
+            allowImages: OLLAMA_VISION_MODEL_TOKENS.some((token) => key.includes(token)),
+          }};
+        }}
+        return ollamaVisionSupportCache.allowImages;
+      }}
+
       function syncAttachmentSupportState() {{
         const provider = (providerSelectEl.value || "ollama").toLowerCase();
         const model = String(lastObservedModelMap[provider] || providerModelMap[provider] || "").toLowerCase();
@@ -6419,7 +6486,7 @@ HTML = f"""<!doctype html>
         let allowText = baseSupported;
         if (provider === "ollama") {{
           allowText = true;
-          allowImages = /(llava|bakllava|vision|moondream|qwen2(?:\\.5)?-vl|minicpm-v|gemma3|phi-3-vision|llama3\\.2-vision)/i.test(model);
+          allowImages = _ollamaModelSupportsImages(model);
         }}
         const canAttach = allowImages || allowText;
         attachBtnEl.disabled = !canAttach;
@@ -7065,6 +7132,8 @@ HTML = f"""<!doctype html>
         httpTraceToggleBtn.textContent = httpTraceExpanded ? "Collapse" : "Expand";
         agentTraceToggleBtn.textContent = agentTraceExpanded ? "Collapse" : "Expand";
         inspectorToggleBtn.textContent = inspectorExpanded ? "Collapse" : "Expand";
+        if (agentTraceExpanded && pendingAgentTraceItems) _mountAgentTraceItems(pendingAgentTraceItems);
+        if (inspectorExpanded && pendingInspectorSections) _mountInspectorSections(pendingInspectorSections);
       }}
 
       function setHttpTraceCount(count) {{
@@ -7115,38 +7184,59 @@ HTML = f"""<!doctype html>
         }}
       }}
 
-      function syncLiteLlmStatusVisibility() {{
-        const isLiteLlm = (providerSelectEl.value || "").toLowerCase() === "litellm";
-        liteLlmStatusPillEl.style.display = isLiteLlm ? "inline-flex" : "none";
-        if (!isLiteLlm) {{
-          setLiteLlmStatus("", "LiteLLM: hidden");
-        }}
-        return isLiteLlm;
+      const PROVIDER_STATUS_PILLS = {{
+        ollama: {{
+          providers: ["ollama"],
+          pillEl: ollamaStatusPillEl,
+          setStatus: setOllamaStatus,
+          hiddenText: "Ollama: hidden",
+          hiddenTitle: "Ollama runtime status (checks only when Ollama provider is selected)",
+          refresh: refreshOllamaStatus,
+        }},
+        litellm: {{
+          providers: ["litellm"],
+          pillEl: liteLlmStatusPillEl,
+          setStatus: setLiteLlmStatus,
+          hiddenText: "LiteLLM: hidden",
+          hiddenTitle: "",
+          refresh: refreshLiteLlmStatus,
+        }},
+        aws: {{
+          providers: ["bedrock_invoke", "bedrock_agent"],
+          pillEl: awsAuthPillEl,
+          setStatus: setAwsAuthStatus,
+          hiddenText: "AWS Auth: hidden",
+          hiddenTitle: "AWS auth source for Bedrock providers",
+          refresh: refreshAwsAuthStatus,
+        }},
+      }};
+
+      function _providerStatusPillActive(key) {{
+        return PROVIDER_STATUS_PILLS[key].providers.includes((providerSelectEl.value || "").toLowerCase());
       }}
 
-      function syncOllamaStatusVisibility() {{
-        const isOllama = (providerSelectEl.value || "").toLowerCase() === "ollama";
-        ollamaStatusPillEl.style.display = isOllama ? "inline-flex" : "none";
-        if (!isOllama) {{
-          setOllamaStatus("", "Ollama: hidden");
-          ollamaStatusPillEl.title = "Ollama runtime status (checks only when Ollama provider is selected)";
+      function syncProviderStatusVisibility() {{
+        const provider = (providerSelectEl.value || "").toLowerCase();
+        const active = [];
+        for (const spec of Object.values(PROVIDER_STATUS_PILLS)) {{
+          const isActive = spec.providers.includes(provider);
+          spec.pillEl.style.display = isActive ? "inline-flex" : "none";
+          if (isActive) {{
+            active.push(spec);
+            continue;
+          }}
+          spec.setStatus("", spec.hiddenText);
+          if (spec.hiddenTitle) spec.pillEl.title = spec.hiddenTitle;
         }}
-        return isOllama;
+        return active;
       }}
 
-      function syncAwsAuthStatusVisibility() {{
-        const p = (providerSelectEl.value || "").toLowerCase();
-        const isAws = p === "bedrock_invoke" || p === "bedrock_agent";
-        awsAuthPillEl.style.display = isAws ? "inline-flex" : "none";
-        if (!isAws) {{
-          setAwsAuthStatus("", "AWS Auth: hidden");
-          awsAuthPillEl.title = "AWS auth source for Bedrock providers";
-        }}
-        return isAws;
+      function refreshProviderStatuses() {{
+        return Promise.all(syncProviderStatusVisibility().map((spec) => spec.refresh()));
       }}
 
       async function refreshAwsAuthStatus() {{
-        if (!syncAwsAuthStatusVisibility()) return;
+        if (!_providerStatusPillActive("aws")) return;
         try {{
           const res = await fetch("/aws-auth-status");
           const data = await res.json();
@@ -7169,7 +7259,7 @@ HTML = f"""<!doctype html>
       }}
 
       async function refreshOllamaStatus() {{
-        if (!syncOllamaStatusVisibility()) return;
+        if (!_providerStatusPillActive("ollama")) return;
         try {{
           const res = await fetch("/ollama-status");
           const data = await res.json();
@@ -7193,7 +7283,7 @@ HTML = f"""<!doctype html>
       }}
 
       async function refreshLiteLlmStatus() {{
-        if (!syncLiteLlmStatusVisibility()) return;
+        if (!_providerStatusPillActive("litellm")) return;
         try {{
           const res = await fetch("/litellm-status");
           const data = await res.json();
@@ -7217,54 +7307,99 @@ HTML = f"""<!doctype html>
         }}
       }}
 
+      const HTML_ESCAPE_TEST_RE = /["'&<>]/;
+
       function escapeHtml(value) {{
-        return String(value)
-          .replaceAll("&", "&amp;")
-          .replaceAll("<", "&lt;")
-          .replaceAll(">", "&gt;");
+        // Single pass over the string: bail out when nothing needs escaping, otherwise
+        // copy the untouched runs between special characters with substring().
+        const str = String(value);
+        const match = HTML_ESCAPE_TEST_RE.exec(str);
+        if (!match) return str;
+        let out = "";
+        let lastIndex = 0;
+        for (let i = match.index; i < str.length; i += 1) {{
+          let escaped;
+          switch (str.charCodeAt(i)) {{
+            case 34: escaped = "&quot;"; break;
+            case 38: escaped = "&amp;"; break;
+            case 39: escaped = "&#39;"; break;
+            case 60: escaped = "&lt;"; break;
+            case 62: escaped = "&gt;"; break;
+            default: continue;
+          }}
+          if (lastIndex !== i) out += str.substring(lastIndex, i);
+          lastIndex = i + 1;
+          out += escaped;
+        }}
+        return lastIndex !== str.length ? out + str.substring(lastIndex) : out;
+      }}
+
+      function _presetItemHtml(p, gi, pi) {{
+        const hasSamples = Array.isArray(p.sample_attachments) && p.sample_attachments.length > 0;
+        const hasSequence = Array.isArray(p.sequence_prompts) && p.sequence_prompts.length > 1;
+        const actions = [];
+        if (hasSamples) {{
+          actions.push(`<button type="button" class="preset-mini-btn" data-preset-attach="1" data-group-index="${{gi}}" data-preset-index="${{pi}}" title="Attach sample file(s) for this preset">Attach Sample</button>`);
+        }}
+        if (hasSequence) {{
+          actions.push(`<button type="button" class="preset-mini-btn" data-preset-sequence="1" data-group-index="${{gi}}" data-preset-index="${{pi}}" title="Auto-run this preset sequence turn-by-turn">Run 2-step</button>`);
+        }}
+        return `
+          <div class="preset-item">
+            <button
+              type="button"
+              class="preset-btn"
+              data-group-index="${{gi}}"
+              data-preset-index="${{pi}}"
+              title="${{escapeHtml((p.hint || "") + (p.requirements ? ` | Requires: ${{p.requirements}}` : ""))}}"
+            >
+              <div class="preset-name">${{escapeHtml(p.name || "Preset")}}</div>
+              <div class="preset-hint">${{escapeHtml(p.hint || "")}}</div>
+            </button>
+            ${{actions.length ? `<div class="preset-actions">${{actions.join("")}}</div>` : ""}}
+          </div>
+        `;
+      }}
+
+      function _presetGroupHtml(group, gi) {{
+        // The grid stays empty until the group is first expanded (see hydratePresetGroup).
+        return `
+          <details class="preset-group-card">
+            <summary class="preset-group-summary">
+              <div class="preset-group-title">${{escapeHtml(group.group || "Presets")}}</div>
+            </summary>
+            <div class="preset-group-content">
+              <div class="preset-grid" data-group-index="${{gi}}"></div>
+            </div>
+          </details>
+        `;
+      }}
+
+      function hydratePresetGroup(gridEl) {{
+        if (!gridEl || gridEl.dataset.hydrated === "1") return;
+        const gi = Number(gridEl.dataset.groupIndex || "-1");
+        const group = (presetPrompts || [])[gi];
+        const presets = group && Array.isArray(group.presets) ? group.presets : [];
+        const buttons = new Array(presets.length);
+        for (let pi = 0; pi < presets.length; pi += 1) {{
+          buttons[pi] = _presetItemHtml(presets[pi], gi, pi);
+        }}
+        gridEl.innerHTML = buttons.join("");
+        gridEl.dataset.hydrated = "1";
       }}
 
       function renderPresetCatalog() {{
         const groups = Array.isArray(presetPrompts) ? presetPrompts : [];
-        presetGroupsEl.innerHTML = groups.map((group, gi) => {{
-          const presets = Array.isArray(group.presets) ? group.presets : [];
-          const buttons = presets.map((p, pi) => {{
-            const hasSamples = Array.isArray(p.sample_attachments) && p.sample_attachments.length > 0;
-            const hasSequence = Array.isArray(p.sequence_prompts) && p.sequence_prompts.length > 1;
-            const actions = [];
-            if (hasSamples) {{
-              actions.push(`<button type="button" class="preset-mini-btn" data-preset-attach="1" data-group-index="${{gi}}" data-preset-index="${{pi}}" title="Attach sample file(s) for this preset">Attach Sample</button>`);
-            }}
-            if (hasSequence) {{
-              actions.push(`<button type="button" class="preset-mini-btn" data-preset-sequence="1" data-group-index="${{gi}}" data-preset-index="${{pi}}" title="Auto-run this preset sequence turn-by-turn">Run 2-step</button>`);
-            }}
-            return `
-              <div class="preset-item">
-                <button
-                  type="button"
-                  class="preset-btn"
-                  data-group-index="${{gi}}"
-                  data-preset-index="${{pi}}"
-                  title="${{escapeHtml((p.hint || "") + (p.requirements ? ` | Requires: ${{p.requirements}}` : ""))}}"
-                >
-                  <div class="preset-name">${{escapeHtml(p.name || "Preset")}}</div>
-                  <div class="preset-hint">${{escapeHtml(p.hint || "")}}</div>
-                </button>
-                ${{actions.length ? `<div class="preset-actions">${{actions.join("")}}</div>` : ""}}
-              </div>
-            `;
-          }}).join("");
-          return `
-            <details class="preset-group-card">
-              <summary class="preset-group-summary">
-                <div class="preset-group-title">${{escapeHtml(group.group || "Presets")}}</div>
-              </summary>
-              <div class="preset-group-content">
-                <div class="preset-grid">${{buttons}}</div>
-              </div>
-            </details>
-          `;
-        }}).join("");
+        // Preset config load/save/reset re-send the catalog even when nothing changed;
+        // skip the rebuild so the markup is not re-parsed and open groups stay open.
+        const catalogKey = JSON.stringify(groups);
+        if (catalogKey === renderedPresetCatalogKey) return;
+        renderedPresetCatalogKey = catalogKey;
+        const parts = new Array(groups.length);
+        for (let gi = 0; gi < groups.length; gi += 1) {{
+          parts[gi] = _presetGroupHtml(groups[gi], gi);
+        }}
+        presetGroupsEl.innerHTML = parts.join("");
       }}
 
       function getPresetByIndex(groupIndex, presetIndex) {{
@@ -7282,6 +7417,25 @@ HTML = f"""<!doctype html>
         promptEl.setSelectionRange(promptEl.value.length, promptEl.value.length);
       }}
 
+      async function _fetchPresetSampleAttachment(rp) {{
+        const res = await fetch(`/preset-attachment?path=${{encodeURIComponent(rp)}}&format=binary`);
+        const contentType = String(res.headers.get("Content-Type") || "");
+        if (res.ok && !contentType.includes("application/json")) {{
+          const blob = await res.blob();
+          return {{
+            kind: "image",
+            name: decodeURIComponent(res.headers.get("X-Attachment-Name") || "") || rp.split("/").pop(),
+            mime: blob.type.startsWith("image/") ? blob.type : "image/png",
+            data_url: await _readFileAsDataUrl(blob),
+          }};
+        }}
+        const data = await res.json();
+        if (!res.ok || !data.ok || !data.attachment) {{
+          throw new Error(data.error || `Could not load sample attachment: ${{rp}}`);
+        }}
+        return data.attachment;
+      }}
+
       async function attachPresetSamples(groupIndex, presetIndex) {{
         const preset = getPresetByIndex(groupIndex, presetIndex);
         if (!preset) return;
@@ -7290,26 +7444,25 @@ HTML = f"""<!doctype html>
           statusEl.textContent = "No sample attachments defined for this preset.";
           return;
         }}
+        const paths = samplePaths.map((relPath) => String(relPath || "").trim()).filter(Boolean);
+        const results = await Promise.allSettled(paths.map(_fetchPresetSampleAttachment));
         let attached = 0;
-        for (const relPath of samplePaths) {{
-          const rp = String(relPath || "").trim();
-          if (!rp) continue;
-          try {{
-            const res = await fetch(`/preset-attachment?path=${{encodeURIComponent(rp)}}`);
-            const data = await res.json();
-            if (!res.ok || !data.ok || !data.attachment) {{
-              throw new Error(data.error || `Could not load sample attachment: ${{rp}}`);
-            }}
-            pendingAttachments.push(data.attachment);
+        let firstError = null;
+        for (const result of results) {{
+          if (result.status === "fulfilled") {{
+            pendingAttachments.push(result.value);
             attached += 1;
-          }} catch (err) {{
-            statusEl.textContent = `Attach sample failed: ${{err?.message || err}}`;
+          }} else if (!firstError) {{
+            firstError = result.reason;
           }}
         }}
         if (attached > 0) {{
           pendingAttachments = pendingAttachments.slice(0, MAX_ATTACHMENTS);
           renderAttachmentBar();
-          statusEl.textContent = `Attached ${{attached}} sample file${{attached === 1 ? "" : "s"}}`;
+          const failed = results.length - attached;
+          statusEl.textContent = `Attached ${{attached}} sample file${{attached === 1 ? "" : "s"}}${{failed ? ` (${{failed}} failed)` : ""}}`;
+        }} else if (firstError) {{
+          statusEl.textContent = `Attach sample failed: ${{firstError?.message || firstError}}`;
         }}
       }}
 
@@ -7362,19 +7515,27 @@ HTML = f"""<!doctype html>
         presetConfigModalEl.setAttribute("aria-hidden", "true");
       }}
 
+      function _presetConfigItemHtml(item, idx) {{
+        return `
+          <div class="preset-config-item">
+            <div class="preset-config-title">${{escapeHtml(item.name || item.key || `Preset ${{idx + 1}}`)}}</div>
+            <div class="preset-config-hint">${{escapeHtml(item.hint || "")}}</div>
+            <textarea data-preset-config-key="${{escapeHtml(item.key || "")}}" placeholder="Preset prompt text...">${{escapeHtml(item.prompt || "")}}</textarea>
+          </div>
+        `;
+      }}
+
       function renderPresetConfigItems(items) {{
         const list = Array.isArray(items) ? items : [];
         if (!list.length) {{
           presetConfigGridEl.innerHTML = '<div class="preset-config-item"><div class="preset-config-title">No configurable AI Guard presets found.</div></div>';
           return;
         }}
-        presetConfigGridEl.innerHTML = list.map((item, idx) => `
-          <div class="preset-config-item">
-            <div class="preset-config-title">${{escapeHtml(item.name || item.key || `Preset ${{idx + 1}}`)}}</div>
-            <div class="preset-config-hint">${{escapeHtml(item.hint || "")}}</div>
-            <textarea data-preset-config-key="${{escapeHtml(item.key || "")}}" placeholder="Preset prompt text...">${{escapeHtml(item.prompt || "")}}</textarea>
-          </div>
-        `).join("");
+        const parts = new Array(list.length);
+        for (let idx = 0; idx < list.length; idx += 1) {{
+          parts[idx] = _presetConfigItemHtml(list[idx], idx);
+        }}
+        presetConfigGridEl.innerHTML = parts.join("");
       }}
 
       async function loadPresetConfig() {{
@@ -7464,16 +7625,33 @@ HTML = f"""<!doctype html>
       function renderAttachmentBar() {{
         if (!attachmentBarEl) return;
         if (!Array.isArray(pendingAttachments) || pendingAttachments.length === 0) {{
-          attachmentBarEl.innerHTML = "";
+          if (renderedAttachmentLabels === "") return;
+          renderedAttachmentLabels = "";
+          attachmentBarEl.textContent = "";
           attachmentBarEl.style.display = "none";
           return;
         }}
-        const chips = pendingAttachments.map((att, idx) => {{
+        const labels = pendingAttachments.map((att) => {{
           const kind = String(att.kind || "file");
-          const label = `${{kind === "image" ? "image" : "text"}}: ${{String(att.name || "attachment")}}`;
-          return `<span class="attachment-chip">${{escapeHtml(label)}} <button type="button" data-attachment-remove="${{idx}}" title="Remove attachment">×</button></span>`;
-        }}).join("");
-        attachmentBarEl.innerHTML = chips;
+          return `${{kind === "image" ? "image" : "text"}}: ${{String(att.name || "attachment")}}`;
+        }});
+        const labelsKey = JSON.stringify(labels);
+        if (labelsKey === renderedAttachmentLabels) return;
+        renderedAttachmentLabels = labelsKey;
+        const frag = document.createDocumentFragment();
+        labels.forEach((label, idx) => {{
+          const chip = document.createElement("span");
+          chip.className = "attachment-chip";
+          chip.textContent = `${{label}} `;
+          const removeBtn = document.createElement("button");
+          removeBtn.type = "button";
+          removeBtn.dataset.attachmentRemove = String(idx);
+          removeBtn.title = "Remove attachment";
+          removeBtn.textContent = "×";
+          chip.appendChild(removeBtn);
+          frag.appendChild(chip);
+        }});
+        attachmentBarEl.replaceChildren(frag);
         attachmentBarEl.style.display = "flex";
       }}
 
@@ -7505,8 +7683,8 @@ HTML = f"""<!doctype html>
       }}
 
       async function handleAttachmentFiles(files) {{
-        const incoming = Array.from(files || []);
-        if (!incoming.length) return;
+        const incomingCount = files ? files.length || 0 : 0;
+        if (!incomingCount) return;
         const provider = (providerSelectEl.value || "ollama").toLowerCase();
         const model = String(lastObservedModelMap[provider] || providerModelMap[provider] || "").toLowerCase();
         const baseSupported = multimodalProviderSet.has(provider);
@@ -7514,24 +7692,34 @@ HTML = f"""<!doctype html>
         let allowText = baseSupported;
         if (provider === "ollama") {{
           allowText = true;
-          allowImages = /(llava|bakllava|vision|moondream|qwen2(?:\\.5)?-vl|minicpm-v|gemma3|phi-3-vision|llama3\\.2-vision)/i.test(model);
+          allowImages = _ollamaModelSupportsImages(model);
         }}
         const room = Math.max(0, MAX_ATTACHMENTS - pendingAttachments.length);
         if (room <= 0) {{
           statusEl.textContent = `Max ${{MAX_ATTACHMENTS}} attachments per message`;
           return;
         }}
-        const accepted = incoming.slice(0, room);
+        const acceptedCount = Math.min(incomingCount, room);
         let skipped = 0;
-        for (const file of accepted) {{
+        const reads = new Array(acceptedCount);
+        for (let i = 0; i < acceptedCount; i += 1) {{
+          const file = files[i];
+          const isImage = String(file.type || "").startsWith("image/");
+          if (isImage ? !allowImages : !allowText) {{
+            skipped += 1;
+            reads[i] = null;
+            continue;
+          }}
+          reads[i] = isImage ? _readFileAsDataUrl(file) : _readFileAsText(file);
+        }}
+        const results = await Promise.all(reads);
+        for (let i = 0; i < acceptedCount; i += 1) {{
+          if (reads[i] === null) continue;
+          const file = files[i];
           const mime = String(file.type || "");
           const name = String(file.name || "attachment");
           if (mime.startsWith("image/")) {{
-            if (!allowImages) {{
-              skipped += 1;
-              continue;
-            }}
-            const dataUrl = await _readFileAsDataUrl(file);
+            const dataUrl = results[i];
             if (dataUrl.length > MAX_IMAGE_DATA_URL_CHARS) {{
               statusEl.textContent = `Image too large: ${{name}}`;
               continue;
@@ -7544,11 +7732,7 @@ HTML = f"""<!doctype html>
             }});
             continue;
           }}
-          if (!allowText) {{
-            skipped += 1;
-            continue;
-          }}
-          const text = await _readFileAsText(file);
+          const text = results[i];
           pendingAttachments.push({{
             kind: "text",
             name,
@@ -7564,32 +7748,94 @@ HTML = f"""<!doctype html>
       }}
 
       function renderConversation() {{
-        const pending = pendingAssistantText ? {{
-          role: "assistant",
-          content: pendingAssistantText,
-          ts: "",
-          pending: true
-        }} : null;
-        const convoItems = pending ? [...conversation, pending] : [...conversation];
-        if (!convoItems.length) {{
+        if (conversationRenderRaf) return;
+        conversationRenderRaf = requestAnimationFrame(() => {{
+          conversationRenderRaf = 0;
+          renderConversationFull();
+        }});
+      }}
+
+      function renderPendingRow() {{
+        // Thinking/stream ticks only change the pending bubble text; patch it in place
+        // and fall back to a full render when the row is not mounted yet.
+        const pendingTextEl = (!conversationRenderRaf && pendingRowEl) ? pendingRowEl.querySelector(".thinking-row > span") : null;
+        if (!pendingAssistantText || !pendingTextEl) {{
+          renderConversation();
+          return;
+        }}
+        pendingTextEl.textContent = pendingAssistantText;
+        conversationViewEl.scrollTop = conversationViewEl.scrollHeight;
+      }}
+
+      const CONVERSATION_ROLE_LABELS = new Map([["user", "User"], ["assistant", "Assistant"]]);
+      const CONVERSATION_ROLE_CLASSES = new Map([["user", "msg-user"], ["assistant", "msg-assistant"]]);
+
+      function _conversationMessageHtml(m) {{
+        const role = (m.role || "assistant").toLowerCase();
+        const label = CONVERSATION_ROLE_LABELS.get(role) || "Assistant";
+        const cls = CONVERSATION_ROLE_CLASSES.get(role) || "msg-assistant";
+        const pendingCls = m.pending ? " msg-pending" : "";
+        const ts = m.ts || "";
+        let attachmentHtml = "";
+        if (Array.isArray(m.attachments) && m.attachments.length) {{
+          const attachmentRows = m.attachments.map(_attachmentToConversationText).filter(Boolean);
+          if (attachmentRows.length) {{
+            attachmentHtml = `<div class="msg-body" style="margin-top:6px; opacity:0.85;">${{escapeHtml(attachmentRows.join("\\n\\n"))}}</div>`;
+          }}
+        }}
+        const bodyHtml = m.pending
+          ? `<div class="msg-body"><span class="thinking-row"><span>${{escapeHtml(m.content || "Working...")}}</span><span class="thinking-dot"></span><span class="thinking-dot"></span><span class="thinking-dot"></span></span></div>`
+          : `<div class="msg-body">${{escapeHtml(m.content || "")}}</div>`;
+        return `<div class="msg ${{cls}}${{pendingCls}}"><div class="msg-head"><div class="msg-role">${{label}}</div><div class="msg-time">${{escapeHtml(ts)}}</div></div>${{bodyHtml}}${{attachmentHtml}}</div>`;
+      }}
+
+      function renderConversationFull() {{
+        if (!conversation.length && !pendingAssistantText) {{
           conversationViewEl.innerHTML = '<div class="msg msg-assistant"><div class="msg-head"><div class="msg-role">Assistant</div><div class="msg-time"></div></div>Send a prompt to start the conversation. In Single-turn mode, each send replaces the transcript. In Multi-turn mode, messages accumulate.</div>';
+          renderedConversation = [];
+          pendingRowEl = null;
           return;
         }}
-        conversationViewEl.innerHTML = convoItems.map((m) => {{
-          const role = (m.role || "assistant").toLowerCase();
-          const label = role === "user" ? "User" : "Assistant";
-          const cls = role === "user" ? "msg-user" : "msg-assistant";
-          const pendingCls = m.pending ? " msg-pending" : "";
-          const ts = m.ts || "";
-          const attachmentRows = Array.isArray(m.attachments) ? m.attachments.map(_attachmentToConversationText).filter(Boolean) : [];
-          const attachmentHtml = attachmentRows.length
-            ? `<div class="msg-body" style="margin-top:6px; opacity:0.85;">${{escapeHtml(attachmentRows.join("\\n\\n"))}}</div>`
-            : "";
-          const bodyHtml = m.pending
-            ? `<div class="msg-body"><span class="thinking-row"><span>${{escapeHtml(m.content || "Working...")}}</span><span class="thinking-dot"></span><span class="thinking-dot"></span><span class="thinking-dot"></span></span></div>`
-            : `<div class="msg-body">${{escapeHtml(m.content || "")}}</div>`;
-          return `<div class="msg ${{cls}}${{pendingCls}}"><div class="msg-head"><div class="msg-role">${{label}}</div><div class="msg-time">${{escapeHtml(ts)}}</div></div>${{bodyHtml}}${{attachmentHtml}}</div>`;
-        }}).join("");
+        // Messages are replaced (not edited) when the transcript changes, so an identical
+        // prefix of message objects means only the tail needs to be appended.
+        let keep = renderedConversation.length <= conversation.length ? renderedConversation.length : 0;
+        for (let i = 0; i < keep; i += 1) {{
+          if (renderedConversation[i] !== conversation[i]) {{
+            keep = 0;
+            break;
+          }}
+        }}
+        if (keep === 0) {{
+          conversationViewEl.innerHTML = "";
+          renderedConversation = [];
+          pendingRowEl = null;
+        }} else if (pendingRowEl) {{
+          pendingRowEl.remove();
+        }}
+        if (keep < conversation.length) {{
+          const parts = new Array(conversation.length - keep);
+          for (let i = keep; i < conversation.length; i += 1) {{
+            parts[i - keep] = _conversationMessageHtml(conversation[i]);
+            renderedConversation.push(conversation[i]);
+          }}
+          conversationViewEl.insertAdjacentHTML("beforeend", parts.join(""));
+        }}
+        if (pendingAssistantText) {{
+          if (pendingRowEl) {{
+            pendingRowEl.querySelector(".thinking-row > span").textContent = pendingAssistantText;
+            conversationViewEl.appendChild(pendingRowEl);
+          }} else {{
+            conversationViewEl.insertAdjacentHTML("beforeend", _conversationMessageHtml({{
+              role: "assistant",
+              content: pendingAssistantText,
+              ts: "",
+              pending: true
+            }}));
+            pendingRowEl = conversationViewEl.lastElementChild;
+          }}
+        }} else {{
+          pendingRowEl = null;
+        }}
         conversationViewEl.scrollTop = conversationViewEl.scrollHeight;
       }}
 
@@ -7611,10 +7857,19 @@ HTML = f"""<!doctype html>
       }}
 
       function thinkingPhrases() {{
-        const phrases = [];
-        const providerBase = _providerThinkingBase();
         const guardrailsOn = !!guardrailsToggleEl.checked;
         const proxyMode = guardrailsOn && !!zscalerProxyModeToggleEl.checked;
+        const flags = (guardrailsOn ? 1 : 0)
+          | (proxyMode ? 2 : 0)
+          | (multiAgentToggleEl.checked ? 4 : 0)
+          | (agenticToggleEl.checked ? 8 : 0)
+          | (toolsToggleEl.checked ? 16 : 0)
+          | (currentChatMode() === "multi" ? 32 : 0);
+        const cacheKey = `${{(providerSelectEl.value || "ollama").toLowerCase()}}|${{flags}}`;
+        const cached = thinkingPhrasesCache.get(cacheKey);
+        if (cached) return cached;
+        const phrases = [];
+        const providerBase = _providerThinkingBase();
 
         if (multiAgentToggleEl.checked) {{
           phrases.push("Orchestrating specialist agents");
@@ -7642,11 +7897,13 @@ HTML = f"""<!doctype html>
           phrases.unshift("Checking Zscaler AI Guard policy");
         }}
 
-        if (currentChatMode() === "multi") {{
+        if (flags & 32) {{
           phrases.push("Maintaining multi-turn conversation context");
         }}
 
-        return [...new Set(phrases)];
+        const unique = [...new Set(phrases)];
+        thinkingPhrasesCache.set(cacheKey, unique);
+        return unique;
       }}
 
       function _thinkingStatusText(message, elapsedSec) {{
@@ -7670,7 +7927,7 @@ HTML = f"""<!doctype html>
             pendingAssistantText = phrases[idx];
           }}
           statusEl.textContent = _thinkingStatusText(pendingAssistantText || "Working on your request", elapsed);
-          renderConversation();
+          renderPendingRow();
         }}, 1200);
       }}
 
@@ -7695,6 +7952,8 @@ HTML = f"""<!doctype html>
 
       function resetAgentTrace() {{
         lastAgentTrace = [];
+        pendingAgentTraceItems = null;
+        agentTraceNodes = new Map();
         setAgentTraceCount(0);
         if (agentRoleSummaryEl) {{
           agentRoleSummaryEl.style.display = "none";
@@ -7890,6 +8149,8 @@ HTML = f"""<!doctype html>
 
       function resetInspector() {{
         setInspectorCount(0);
+        pendingInspectorSections = null;
+        inspectorNodes = new Map();
         inspectorListEl.innerHTML = `
           <div class="agent-step">
             <div class="agent-step-head">
@@ -7903,21 +8164,42 @@ HTML = f"""<!doctype html>
       function _flattenTextBlocks(value) {{
         if (value == null) return "";
         if (typeof value === "string") return value;
-        if (Array.isArray(value)) {{
-          return value.map((v) => _flattenTextBlocks(v)).filter(Boolean).join("\\n\\n");
+        const out = [];
+        const stack = [value];
+        while (stack.length) {{
+          let v = stack.pop();
+          if (v && typeof v === "object" && !Array.isArray(v)) {{
+            if (typeof v.text === "string") v = v.text;
+            else if (typeof v.content === "string") v = v.content;
+            else if (Array.isArray(v.content)) v = v.content;
+            else if (Array.isArray(v.parts)) v = v.parts;
+            else continue;
+          }}
+          if (typeof v === "string") {{
+            if (v) out.push(v);
+          }} else if (Array.isArray(v)) {{
+            for (let i = v.length - 1; i >= 0; i -= 1) stack.push(v[i]);
+          }}
         }}
-        if (typeof value === "object") {{
-          if (typeof value.text === "string") return value.text;
-          if (typeof value.content === "string") return value.content;
-          if (Array.isArray(value.content)) return _flattenTextBlocks(value.content);
-          if (Array.isArray(value.parts)) return _flattenTextBlocks(value.parts);
+        return out.join("\\n\\n");
+      }}
+
+      function _hash32(text) {{
+        // 32-bit FNV-1a; used for dedupe/render keys so large payloads are not copied into key strings.
+        let h = 0x811c9dc5;
+        for (let i = 0; i < text.length; i += 1) {{
+          h ^= text.charCodeAt(i);
+          h = Math.imul(h, 0x01000193);
         }}
-        return "";
+        return h >>> 0;
       }}
 
       function _collectPromptLikeSectionsFromPayload(payload, contextTitle, extras = {{}}) {{
         const sections = [];
         if (!payload || typeof payload !== "object") return sections;
+        if (payload.system == null && payload.messages == null && payload.input == null && payload.contents == null) {{
+          return sections;
+        }}
         const systemText = _flattenTextBlocks(payload.system);
         if (systemText.trim()) {{
           sections.push({{
@@ -7977,10 +8259,13 @@ HTML = f"""<!doctype html>
         ];
 
         const pushSection = (s) => {{
-          if (!s || !String(s.content || "").trim()) return;
-          const key = `${{s.title}}@@${{String(s.content).trim()}}`;
+          if (!s) return;
+          const content = String(s.content || "").trim();
+          if (!content) return;
+          const key = `${{_hash32(String(s.title))}}:${{_hash32(content)}}`;
           if (seen.has(key)) return;
           seen.add(key);
+          s._key = key;
           sections.push(s);
         }};
 
@@ -8013,9 +8298,12 @@ HTML = f"""<!doctype html>
           _collectPromptLikeSectionsFromPayload(payload, stepName, {{ source: "provider_trace" }}).forEach(pushSection);
         }});
 
-        agentTrace.forEach((item, idx) => {{
-          const kind = String(item?.kind || "").toLowerCase();
-          const agentName = String(item?.agent || "").trim();
+        for (let idx = 0, len = agentTrace.length; idx < len; idx += 1) {{
+          const item = agentTrace[idx];
+          if (!item) continue;
+          const kind = item.kind ? String(item.kind).toLowerCase() : "";
+          if (kind !== "llm" && kind !== "tool" && kind !== "multi_agent") continue;
+          const agentName = item.agent ? String(item.agent).trim() : "";
           if (kind === "llm") {{
             const reqPayload = item?.trace_step?.request?.payload;
             const base = agentName ? `Agent LLM (${{agentName}})` : `Agent LLM Step ${{idx + 1}}`;
@@ -8031,18 +8319,20 @@ HTML = f"""<!doctype html>
             }}
           }} else if (kind === "tool") {{
             const toolName = String(item?.tool || "tool");
-            pushSection({{
-              title: `Tool Input (${{toolName}})${{agentName ? ` · ${{agentName}}` : ""}}`,
-              kind: "tool",
-              source: "agent_trace",
-              content: pretty(item?.input || {{}}),
-            }});
+            if (item.input) {{
+              pushSection({{
+                title: `Tool Input (${{toolName}})${{agentName ? ` · ${{agentName}}` : ""}}`,
+                kind: "tool",
+                source: "agent_trace",
+                content: prettyCached(item.input),
+              }});
+            }}
             if (item?.tool_trace?.request?.payload) {{
               pushSection({{
                 title: `Tool Request Payload (${{toolName}})`,
                 kind: "tool",
                 source: "agent_trace",
-                content: pretty(item.tool_trace.request.payload),
+                content: prettyCached(item.tool_trace.request.payload),
               }});
             }}
           }} else if (kind === "multi_agent") {{
@@ -8061,7 +8351,7 @@ HTML = f"""<!doctype html>
               content: pretty(summary),
             }});
           }}
-        }});
+        }}
 
         const finalResponse = String(body?.response || body?.error || body?.details || "").trim();
         if (finalResponse) {{
@@ -8097,6 +8387,54 @@ HTML = f"""<!doctype html>
         return sections;
       }}
 
+      const INSPECTOR_BADGES = new Map([
+        ["system", ["badge-ai", "System"]],
+        ["tool", ["badge-agent", "Tool"]],
+        ["protocol", ["badge-ai", "Protocol"]],
+        ["assistant", ["badge-ollama", "Output"]],
+        ["agent", ["badge-agent", "Agent"]],
+      ]);
+      const AGENT_TRACE_BADGES = new Map([
+        ["tool", ["badge-agent", "Tool"]],
+        ["mcp", ["badge-ollama", "MCP"]],
+        ["multi_agent", ["badge-agent", "Multi-Agent"]],
+      ]);
+
+      function _agentStepEl(title, badge, content) {{
+        const stepEl = document.createElement("div");
+        stepEl.className = "agent-step";
+        const headEl = document.createElement("div");
+        headEl.className = "agent-step-head";
+        const titleEl = document.createElement("div");
+        titleEl.className = "agent-step-title";
+        titleEl.textContent = title;
+        const badgeWrapEl = document.createElement("div");
+        const badgeEl = document.createElement("span");
+        badgeEl.className = `badge ${{badge[0]}}`;
+        badgeEl.textContent = badge[1];
+        badgeWrapEl.appendChild(badgeEl);
+        headEl.append(titleEl, badgeWrapEl);
+        const preEl = document.createElement("pre");
+        preEl.textContent = content;
+        stepEl.append(headEl, preEl);
+        return stepEl;
+      }}
+
+      function _renderKeyedSteps(listEl, mountedNodes, steps) {{
+        // Reuse the step nodes whose key is still present, build only new ones, and swap
+        // the list contents in one go; nodes for keys that disappeared are dropped.
+        const nextNodes = new Map();
+        const frag = document.createDocumentFragment();
+        for (const step of steps) {{
+          let node = nextNodes.has(step.key) ? null : mountedNodes.get(step.key);
+          if (!node) node = step.build();
+          if (!nextNodes.has(step.key)) nextNodes.set(step.key, node);
+          frag.appendChild(node);
+        }}
+        listEl.replaceChildren(frag);
+        return nextNodes;
+      }}
+
       function renderInspector(entry) {{
         const sections = extractInspectorSections(entry);
         setInspectorCount(sections.length);
@@ -8104,24 +8442,59 @@ HTML = f"""<!doctype html>
           resetInspector();
           return;
         }}
-        inspectorListEl.innerHTML = sections.map((s) => {{
-          let badge = '<span class="badge badge-ollama">Prompt</span>';
-          const kind = String(s.kind || "").toLowerCase();
-          if (kind === "system") badge = '<span class="badge badge-ai">System</span>';
-          else if (kind === "tool") badge = '<span class="badge badge-agent">Tool</span>';
-          else if (kind === "protocol") badge = '<span class="badge badge-ai">Protocol</span>';
-          else if (kind === "assistant") badge = '<span class="badge badge-ollama">Output</span>';
-          else if (kind === "agent") badge = '<span class="badge badge-agent">Agent</span>';
-          return `
-            <div class="agent-step">
-              <div class="agent-step-head">
-                <div class="agent-step-title">${{escapeHtml(s.title || "Inspector")}}</div>
-                <div>${{badge}}</div>
-              </div>
-              <pre>${{escapeHtml(String(s.content || ""))}}</pre>
-            </div>
-          `;
-        }}).join("");
+        if (!inspectorExpanded) {{
+          // Collapsed: keep the count current and build the step nodes when the panel opens.
+          pendingInspectorSections = sections;
+          return;
+        }}
+        _mountInspectorSections(sections);
+      }}
+
+      function _mountInspectorSections(sections) {{
+        pendingInspectorSections = null;
+        inspectorNodes = _renderKeyedSteps(inspectorListEl, inspectorNodes, sections.map((s) => ({{
+          key: s._key,
+          build: () => _agentStepEl(
+            s.title || "Inspector",
+            INSPECTOR_BADGES.get(String(s.kind || "").toLowerCase()) || ["badge-ollama", "Prompt"],
+            String(s.content || "")
+          ),
+        }})));
+      }}
+
+      function _agentTraceStepView(item, idx) {{
+        const kind = String(item.kind || "").toLowerCase();
+        const agentLabel = item.agent ? ` (${{String(item.agent)}})` : "";
+        let title = `Step ${{item.step || (idx + 1)}} LLM Decision${{agentLabel}}`;
+        if (kind === "tool") {{
+          title = `Step ${{item.step || (idx + 1)}} Tool: ${{item.tool || "unknown"}}${{agentLabel}}`;
+        }} else if (kind === "mcp") {{
+          title = `MCP: ${{item.event || "event"}}${{agentLabel}}`;
+        }} else if (kind === "multi_agent") {{
+          title = `Multi-Agent: ${{item.event || "event"}}${{agentLabel}}`;
+        }}
+        return {{ title, badge: AGENT_TRACE_BADGES.get(kind) || ["badge-ai", "Agent Step"], detail: _agentTraceStepDetail(item, kind) }};
+      }}
+
+      function _agentTraceStepDetail(item, kind) {{
+        if (kind === "mcp" || kind === "multi_agent") return prettyCached(item);
+        let detail = agentTraceDetailCache.get(item);
+        if (detail !== undefined) return detail;
+        detail = kind === "tool"
+          ? pretty({{
+            agent: item.agent,
+            tool: item.tool,
+            input: item.input,
+            output: item.output,
+            tool_trace: item.tool_trace
+          }})
+          : pretty({{
+            agent: item.agent,
+            trace_step: item.trace_step,
+            raw_output: item.raw_output
+          }});
+        agentTraceDetailCache.set(item, detail);
+        return detail;
       }}
 
       function renderAgentTrace(traceItems) {{
@@ -8132,55 +8505,35 @@ HTML = f"""<!doctype html>
           resetAgentTrace();
           return;
         }}
+        if (!agentTraceExpanded) {{
+          pendingAgentTraceItems = items;
+          return;
+        }}
+        _mountAgentTraceItems(items);
+      }}
+
+      function _mountAgentTraceItems(items) {{
+        pendingAgentTraceItems = null;
         renderAgentRoleSummary(items);
-        agentTraceListEl.innerHTML = items.map((item, idx) => {{
-          const kind = String(item.kind || "").toLowerCase();
-          const agentLabel = item.agent ? ` (${{escapeHtml(String(item.agent))}})` : "";
-          let badge = '<span class="badge badge-ai">Agent Step</span>';
-          let title = `Step ${{item.step || (idx + 1)}} LLM Decision${{agentLabel}}`;
-          let detail = pretty({{
-            agent: item.agent,
-            trace_step: item.trace_step,
-            raw_output: item.raw_output
-          }});
-          if (kind === "tool") {{
-            badge = '<span class="badge badge-agent">Tool</span>';
-            title = `Step ${{item.step || (idx + 1)}} Tool: ${{escapeHtml(item.tool || "unknown")}}${{agentLabel}}`;
-            detail = pretty({{
-              agent: item.agent,
-              tool: item.tool,
-              input: item.input,
-              output: item.output,
-              tool_trace: item.tool_trace
-            }});
-          }} else if (kind === "mcp") {{
-            badge = '<span class="badge badge-ollama">MCP</span>';
-            title = `MCP: ${{escapeHtml(item.event || "event")}}${{agentLabel}}`;
-            detail = pretty(item);
-          }} else if (kind === "multi_agent") {{
-            badge = '<span class="badge badge-agent">Multi-Agent</span>';
-            title = `Multi-Agent: ${{escapeHtml(item.event || "event")}}${{agentLabel}}`;
-            detail = pretty(item);
-          }}
-          return `
-            <div class="agent-step">
-              <div class="agent-step-head">
-                <div class="agent-step-title">${{title}}</div>
-                <div>${{badge}}</div>
-              </div>
-              <pre>${{escapeHtml(detail)}}</pre>
-            </div>
-          `;
-        }}).join("");
+        agentTraceNodes = _renderKeyedSteps(agentTraceListEl, agentTraceNodes, items.map((item, idx) => {{
+          const view = _agentTraceStepView(item, idx);
+          return {{
+            key: `${{_hash32(view.title)}}:${{_hash32(view.detail)}}`,
+            build: () => _agentStepEl(view.title, view.badge, view.detail),
+          }};
+        }}));
       }}
 
       function renderCodeBlock(section) {{
         const explain = codeSectionExplanation(section);
         const lines = String(section.code || "").replace(/\\n$/, "").split("\\n");
-        const lineRows = lines.map((line, idx) => {{
+        const rows = new Array(lines.length);
+        for (let i = 0; i < lines.length; i += 1) {{
+          const line = lines[i];
           const safeLine = line.length ? escapeHtml(line) : '<span class="code-empty"> </span>';
-          return `<div class="code-line"><span class="code-ln">${{idx + 1}}</span><span class="code-txt">${{safeLine}}</span></div>`;
-        }}).join("");
+          rows[i] = '<div class="code-line"><span class="code-ln">' + (i + 1) + '</span><span class="code-txt">' + safeLine + "</span></div>";
+        }}
+        const lineRows = rows.join("");
         return `
           <div class="code-panel">
             <div class="code-panel-head">
@@ -8228,8 +8581,15 @@ HTML = f"""<!doctype html>
       }}
 
       function resetFlowGraph() {{
+        if (flowDragRaf) {{
+          cancelAnimationFrame(flowDragRaf);
+          flowDragRaf = 0;
+        }}
+        flowGraphDragState = null;
+        flowHoverEl = null;
         flowGraphState = null;
         flowGraphSvgEl.innerHTML = "";
+        flowGraphDom = null;
         flowGraphSvgEl.style.display = "none";
         flowGraphEmptyEl.style.display = "block";
         flowGraphTooltipEl.style.display = "none";
@@ -8266,6 +8626,35 @@ HTML = f"""<!doctype html>
         flowLatencySummaryEl.style.display = "block";
       }}
 
+      // The synthetic trace parts of a planned preview depend only on a few toggles, so they are
+      // built once per combination and shared (never mutated) across preview renders.
+      const PLANNED_FLOW_TRACE = Object.freeze({{ steps: Object.freeze([]) }});
+      const PLANNED_FLOW_NO_EVENTS = Object.freeze([]);
+      const plannedFlowEventsCache = new Map();
+
+      function _plannedMultiAgentTrace(tools, localTasks) {{
+        const key = `agents|${{tools ? 1 : 0}}|${{localTasks ? 1 : 0}}`;
+        let events = plannedFlowEventsCache.get(key);
+        if (!events) {{
+          events = Object.freeze([
+            {{ kind: "multi_agent", event: "pipeline_start", tools_enabled: tools, local_tasks_enabled: localTasks }},
+            {{ kind: "multi_agent", event: "spawn_agent", to_agent: tools ? "researcher" : "domain_analyst", label: tools ? "Researcher" : "Domain Analyst", task: "Planned specialist chosen by orchestrator", tools_allowed: tools, tools_enabled_for_agent: tools }}
+          ]);
+          plannedFlowEventsCache.set(key, events);
+        }}
+        return events;
+      }}
+
+      function _plannedToolsetEvents(localTasks) {{
+        const key = `tools|${{localTasks ? 1 : 0}}`;
+        let events = plannedFlowEventsCache.get(key);
+        if (!events) {{
+          events = Object.freeze([{{ kind: "mcp", event: "tools_list", tool_count: localTasks ? 17 : 12, server_info: {{ name: "local-llm-demo-mcp-tools" }} }}]);
+          plannedFlowEventsCache.set(key, events);
+        }}
+        return events;
+      }}
+
       function _plannedFlowEntry() {{
         const provider = String(providerSelectEl.value || "ollama");
         const guardrailsEnabled = !!guardrailsToggleEl.checked;
@@ -8297,18 +8686,30 @@ HTML = f"""<!doctype html>
               blocked: false,
               mode: proxyMode ? "proxy" : "api",
             }},
-            trace: {{ steps: [] }},
-            agent_trace: multiAgent
-              ? [
-                  {{ kind: "multi_agent", event: "pipeline_start", tools_enabled: tools, local_tasks_enabled: localTasks }},
-                  {{ kind: "multi_agent", event: "spawn_agent", to_agent: tools ? "researcher" : "domain_analyst", label: tools ? "Researcher" : "Domain Analyst", task: "Planned specialist chosen by orchestrator", tools_allowed: tools, tools_enabled_for_agent: tools }}
-                ]
-              : [],
-            toolset_events: tools ? [{{ kind: "mcp", event: "tools_list", tool_count: localTasks ? 17 : 12, server_info: {{ name: "local-llm-demo-mcp-tools" }} }}] : [],
+            trace: PLANNED_FLOW_TRACE,
+            agent_trace: multiAgent ? _plannedMultiAgentTrace(tools, localTasks) : PLANNED_FLOW_NO_EVENTS,
+            toolset_events: tools ? _plannedToolsetEvents(localTasks) : PLANNED_FLOW_NO_EVENTS,
           }},
         }};
       }}
 
+      function _plannedFlowSignature(entry) {{
+        return [
+          entry.provider,
+          entry.chatMode,
+          entry.conversationId,
+          entry.demoUser,
+          entry.guardrailsEnabled,
+          entry.zscalerProxyMode,
+          entry.agenticEnabled,
+          entry.multiAgentEnabled,
+          entry.toolsEnabled,
+          entry.localTasksEnabled,
+          entry.toolPermissionProfile,
+          entry.executionTopology,
+        ].join("|");
+      }}
+
       function showPlannedFlowPreview() {{
         updateDemoPathHint();
         const planned = _plannedFlowEntry();
@@ -8327,21 +8728,26 @@ HTML = f"""<!doctype html>
         showPlannedFlowPreview();
       }}
 
+      function _setDisabled(el, disabled) {{
+        // Replay status runs on every navigation step; skip writes that would not change anything.
+        if (el.disabled !== disabled) el.disabled = disabled;
+      }}
+
       function _updateFlowReplayStatus() {{
         if (!Array.isArray(traceHistory) || !traceHistory.length || selectedTraceIndex < 0) {{
           flowReplayStatusEl.textContent = "Trace replay: none";
-          flowReplayPrevBtn.disabled = true;
-          flowReplayNextBtn.disabled = true;
-          flowExportBtn.disabled = true;
+          _setDisabled(flowReplayPrevBtn, true);
+          _setDisabled(flowReplayNextBtn, true);
+          _setDisabled(flowExportBtn, true);
           return;
         }}
         const total = traceHistory.length;
         const display = selectedTraceIndex + 1;
         const latestText = selectedTraceIndex === 0 ? " (latest)" : "";
         flowReplayStatusEl.textContent = `Trace replay: ${{display}} of ${{total}}${{latestText}}`;
-        flowReplayPrevBtn.disabled = selectedTraceIndex >= (total - 1);
-        flowReplayNextBtn.disabled = selectedTraceIndex <= 0;
-        flowExportBtn.disabled = false;
+        _setDisabled(flowReplayPrevBtn, selectedTraceIndex >= (total - 1));
+        _setDisabled(flowReplayNextBtn, selectedTraceIndex <= 0);
+        _setDisabled(flowExportBtn, false);
       }}
 
       function getSelectedTraceEntry() {{
@@ -8350,16 +8756,28 @@ HTML = f"""<!doctype html>
         return traceHistory[selectedTraceIndex] || null;
       }}
 
+      function cancelTraceViewsRender() {{
+        if (!traceViewsRenderRaf) return;
+        cancelAnimationFrame(traceViewsRenderRaf);
+        traceViewsRenderRaf = 0;
+      }}
+
       function renderSelectedTraceViews() {{
-        const entry = getSelectedTraceEntry();
-        latestTraceEntry = entry;
-        if (flowPreviewWatermarkEl) flowPreviewWatermarkEl.style.display = "none";
-        renderFlowGraph(entry);
-        renderInspector(entry);
-        if (flowExplainModalEl.classList.contains("open")) {{
-          renderFlowExplain(entry);
-        }}
-        _updateFlowReplayStatus();
+        latestTraceEntry = getSelectedTraceEntry();
+        if (traceViewsRenderRaf) return;
+        traceViewsRenderRaf = requestAnimationFrame(() => {{
+          traceViewsRenderRaf = 0;
+          // One pass per frame: a burst of replay steps only lays out the panels once.
+          const entry = getSelectedTraceEntry();
+          latestTraceEntry = entry;
+          if (flowPreviewWatermarkEl) flowPreviewWatermarkEl.style.display = "none";
+          renderFlowGraph(entry);
+          renderInspector(entry);
+          if (flowExplainOpen) {{
+            renderFlowExplain(entry);
+          }}
+          _updateFlowReplayStatus();
+        }});
       }}
 
       function moveTraceReplay(direction) {{
@@ -8372,10 +8790,11 @@ HTML = f"""<!doctype html>
         renderSelectedTraceViews();
       }}
 
+      const FLOW_NODE_KINDS = new Set(["client", "app", "aiguard", "provider", "agent", "tool"]);
+
       function flowNodeClass(kind) {{
         const k = String(kind || "").toLowerCase();
-        if (["client","app","aiguard","provider","agent","tool"].includes(k)) return k;
-        return "app";
+        return FLOW_NODE_KINDS.has(k) ? k : "app";
       }}
 
       function _short(text, maxLen = 220) {{
@@ -8383,51 +8802,89 @@ HTML = f"""<!doctype html>
         return s.length > maxLen ? `${{s.slice(0, maxLen)}}...` : s;
       }}
 
+      const JSON_PREVIEW_HEAD_CHARS = 1024;
+      const jsonPreviewCache = new WeakMap();
+
       function _jsonPreview(value, maxLen = 260) {{
+        // Previews are cut to a few hundred characters, so compact JSON carries more of the value
+        // than an indented dump; only the head is kept per object since that is all _short uses.
         try {{
-          return _short(JSON.stringify(value, null, 2), maxLen);
+          if (!value || typeof value !== "object") return _short(JSON.stringify(value), maxLen);
+          let head = jsonPreviewCache.get(value);
+          if (head === undefined) {{
+            head = String(JSON.stringify(value) ?? "").slice(0, JSON_PREVIEW_HEAD_CHARS);
+            jsonPreviewCache.set(value, head);
+          }}
+          return _short(head, maxLen);
         }} catch {{
           return _short(String(value), maxLen);
         }}
       }}
 
+      const PROVIDER_LABELS = new Map([
+        ["ollama", "Ollama (Local)"],
+        ["anthropic", "Anthropic"],
+        ["openai", "OpenAI"],
+        ["bedrock_invoke", "AWS Bedrock"],
+        ["bedrock_agent", "AWS Bedrock Agent"],
+        ["perplexity", "Perplexity"],
+        ["xai", "xAI (Grok)"],
+        ["gemini", "Google Gemini"],
+        ["vertex", "Google Vertex"],
+        ["kong", "Kong Gateway"],
+        ["litellm", "LiteLLM"],
+        ["azure_foundry", "Azure AI Foundry"],
+      ]);
+
+      // Checked in order: explicit "provider/" prefixes win over bare model family names.
+      const MODEL_PROVIDER_PREFIXES = [
+        ["anthropic/", "Anthropic"],
+        ["openai/", "OpenAI"],
+        ["perplexity/", "Perplexity"],
+        ["xai/", "xAI (Grok)"],
+        ["google/", "Google"],
+        ["vertex_ai/", "Google"],
+        ["azure/", "Azure"],
+        ["bedrock/", "AWS Bedrock"],
+        ["amazon.", "AWS Bedrock"],
+        ["claude-", "Anthropic"],
+        ["gpt-", "OpenAI"],
+        ["o1", "OpenAI"],
+        ["o3", "OpenAI"],
+        ["o4", "OpenAI"],
+      ];
+      const MODEL_PROVIDER_SUBSTRINGS = [
+        ["grok", "xAI (Grok)"],
+        ["sonar", "Perplexity"],
+        ["gemini", "Google Gemini"],
+        ["nova", "AWS Bedrock"],
+      ];
+
       function _providerLabel(providerId) {{
-        if (providerId === "ollama") return "Ollama (Local)";
-        if (providerId === "anthropic") return "Anthropic";
-        if (providerId === "openai") return "OpenAI";
-        if (providerId === "bedrock_invoke") return "AWS Bedrock";
-        if (providerId === "bedrock_agent") return "AWS Bedrock Agent";
-        if (providerId === "perplexity") return "Perplexity";
-        if (providerId === "xai") return "xAI (Grok)";
-        if (providerId === "gemini") return "Google Gemini";
-        if (providerId === "vertex") return "Google Vertex";
-        if (providerId === "kong") return "Kong Gateway";
-        if (providerId === "litellm") return "LiteLLM";
-        if (providerId === "azure_foundry") return "Azure AI Foundry";
-        return providerId;
+        return PROVIDER_LABELS.get(providerId) || providerId;
       }}
 
       function _inferProviderFromModelName(modelName) {{
         const m = String(modelName || "").trim().toLowerCase();
         if (!m) return "";
-        if (m.startsWith("anthropic/")) return "Anthropic";
-        if (m.startsWith("openai/")) return "OpenAI";
-        if (m.startsWith("perplexity/")) return "Perplexity";
-        if (m.startsWith("xai/")) return "xAI (Grok)";
-        if (m.startsWith("google/") || m.startsWith("vertex_ai/")) return "Google";
-        if (m.startsWith("azure/")) return "Azure";
-        if (m.startsWith("bedrock/") || m.startsWith("amazon.")) return "AWS Bedrock";
-        if (m.startsWith("claude-")) return "Anthropic";
-        if (m.startsWith("gpt-") || m.startsWith("o1") || m.startsWith("o3") || m.startsWith("o4")) return "OpenAI";
-        if (m.includes("grok")) return "xAI (Grok)";
-        if (m.includes("sonar")) return "Perplexity";
-        if (m.includes("gemini")) return "Google Gemini";
-        if (m.includes("nova")) return "AWS Bedrock";
+        for (const [prefix, label] of MODEL_PROVIDER_PREFIXES) {{
+          if (m.startsWith(prefix)) return label;
+        }}
+        for (const [needle, label] of MODEL_PROVIDER_SUBSTRINGS) {{
+          if (m.includes(needle)) return label;
+        }}
         return "";
       }}
 
+      const GATEWAY_PROVIDER_IDS = new Set(["litellm", "kong"]);
+      const GATEWAY_METADATA_KEYS = ["provider", "provider_name", "litellm_provider", "model", "deployment"];
+
+      function _isGatewayProvider(providerId) {{
+        return GATEWAY_PROVIDER_IDS.has(String(providerId || "").toLowerCase());
+      }}
+
+      // Callers check _isGatewayProvider() first; the payload digging below only applies to gateways.
       function _extractGatewayDownstreamMeta(providerId, providerStep) {{
-        if (!["litellm", "kong"].includes(String(providerId || "").toLowerCase())) return {{}};
         const step = providerStep || {{}};
         const req = (step.request && typeof step.request === "object") ? step.request : {{}};
         const res = (step.response && typeof step.response === "object") ? step.response : {{}};
@@ -8456,10 +8913,10 @@ HTML = f"""<!doctype html>
         ];
         for (const [loc, obj] of locations) {{
           if (!obj || typeof obj !== "object") continue;
-          for (const key of ["provider", "provider_name", "litellm_provider", "model", "deployment"]) {{
-            if (Object.prototype.hasOwnProperty.call(obj, key) && obj[key] != null && obj[key] !== "") {{
-              observedPairs.push(`${{loc}}.${{key}}=${{String(obj[key])}}`);
-            }}
+          for (const key of GATEWAY_METADATA_KEYS) {{
+            // Parsed JSON bodies: none of these keys exist on Object.prototype, so a plain read is enough.
+            const value = obj[key];
+            if (value != null && value !== "") observedPairs.push(loc + "." + key + "=" + value);
           }}
         }}
 
@@ -8487,18 +8944,26 @@ HTML = f"""<!doctype html>
         return meta;
       }}
 
+      const PROVIDER_UPSTREAM_ENDPOINTS = new Map([
+        ["anthropic", "https://api.anthropic.com"],
+        ["openai", "https://api.openai.com"],
+        ["perplexity", "https://api.perplexity.ai"],
+        ["xai", "https://api.x.ai"],
+        ["gemini", "https://generativelanguage.googleapis.com"],
+        ["vertex", "https://aiplatform.googleapis.com"],
+        ["azure_foundry", "https://<your-resource>.services.ai.azure.com"],
+        ["bedrock_invoke", "https://bedrock-runtime.<region>.amazonaws.com"],
+        ["bedrock_agent", "https://bedrock-agent-runtime.<region>.amazonaws.com"],
+      ]);
+      const URL_SCHEME_DEFAULT_PORTS = new Map([
+        ["https:", "443"],
+        ["http:", "80"],
+        ["ws:", "80"],
+        ["wss:", "443"],
+      ]);
+
       function _providerUpstreamEndpoint(providerId) {{
-        const pid = String(providerId || "").toLowerCase();
-        if (pid === "anthropic") return "https://api.anthropic.com";
-        if (pid === "openai") return "https://api.openai.com";
-        if (pid === "perplexity") return "https://api.perplexity.ai";
-        if (pid === "xai") return "https://api.x.ai";
-        if (pid === "gemini") return "https://generativelanguage.googleapis.com";
-        if (pid === "vertex") return "https://aiplatform.googleapis.com";
-        if (pid === "azure_foundry") return "https://<your-resource>.services.ai.azure.com";
-        if (pid === "bedrock_invoke") return "https://bedrock-runtime.<region>.amazonaws.com";
-        if (pid === "bedrock_agent") return "https://bedrock-agent-runtime.<region>.amazonaws.com";
-        return "";
+        return PROVIDER_UPSTREAM_ENDPOINTS.get(String(providerId || "").toLowerCase()) || "";
       }}
 
       function _safeUrlForParsing(value) {{
@@ -8510,12 +8975,39 @@ HTML = f"""<!doctype html>
 
       function _portForUrl(u) {{
         if (!u) return "";
-        if (u.port) return u.port;
-        if (u.protocol === "https:") return "443";
-        if (u.protocol === "http:") return "80";
-        if (u.protocol === "ws:") return "80";
-        if (u.protocol === "wss:") return "443";
-        return "";
+        return u.port || URL_SCHEME_DEFAULT_PORTS.get(u.protocol) || "";
+      }}
+
+      const URL_PARSE_CACHE_MAX = 512;
+      const urlParseCache = new Map();
+
+      function _parseUrlCached(urlText) {{
+        if (!urlText) return null;
+        if (urlParseCache.has(urlText)) {{
+          const hit = urlParseCache.get(urlText);
+          urlParseCache.delete(urlText);
+          urlParseCache.set(urlText, hit);
+          return hit;
+        }}
+        let parsed = null;
+        try {{
+          const u = new URL(urlText);
+          parsed = {{
+            protocol: u.protocol,
+            scheme: u.protocol.replace(":", "").toUpperCase(),
+            host: u.hostname || "",
+            hostWithPort: u.host || "",
+            port: _portForUrl(u),
+            pathname: u.pathname || "",
+          }};
+        }} catch {{
+          parsed = null;
+        }}
+        if (urlParseCache.size >= URL_PARSE_CACHE_MAX) {{
+          urlParseCache.delete(urlParseCache.keys().next().value);
+        }}
+        urlParseCache.set(urlText, parsed);
+        return parsed;
       }}
 
       function _transportMetaFromUrl(urlLike, fallback = {{}}) {{
@@ -8526,56 +9018,87 @@ HTML = f"""<!doctype html>
             ...(fallback.note ? {{ "Transport Note": fallback.note }} : {{}})
           }};
         }}
-        try {{
-          const u = new URL(urlText);
-          const isHttpish = ["http:", "https:", "ws:", "wss:"].includes(u.protocol);
-          const scheme = u.protocol.replace(":", "").toUpperCase();
-          const port = _portForUrl(u);
-          const meta = {{
-            "Transport Type": isHttpish
-              ? `${{scheme}} (app-visible URL)`
-              : `${{scheme}} (app-visible URL)`,
-            "Protocol / Scheme": scheme,
-            "Host": u.hostname || "",
-            "Port": port || "",
-          }};
-          if (isHttpish) {{
-            meta["Traffic Class"] = (u.protocol === "ws:" || u.protocol === "wss:")
-              ? "WebSocket (inferred from URL scheme)"
-              : "HTTP(S) JSON/API (inferred from traced URL)";
-            meta["HTTP Wire Version"] = "Not exposed to app trace (could be HTTP/1.1 or HTTP/2)";
-          }}
-          if (u.pathname) {{
-            meta["Path"] = u.pathname;
-          }}
-          if (fallback.note) {{
-            meta["Transport Note"] = fallback.note;
-          }}
-          return meta;
-        }} catch {{
+        const u = _parseUrlCached(urlText);
+        if (!u) {{
           return {{
             "Transport Type": fallback.transportType || "Not parseable from trace",
             ...(urlText ? {{ "URL (raw)": urlText }} : {{}}),
             ...(fallback.note ? {{ "Transport Note": fallback.note }} : {{}})
           }};
         }}
+        const isHttpish = ["http:", "https:", "ws:", "wss:"].includes(u.protocol);
+        const meta = {{
+          "Transport Type": `${{u.scheme}} (app-visible URL)`,
+          "Protocol / Scheme": u.scheme,
+          "Host": u.host,
+          "Port": u.port || "",
+        }};
+        if (isHttpish) {{
+          meta["Traffic Class"] = (u.protocol === "ws:" || u.protocol === "wss:")
+            ? "WebSocket (inferred from URL scheme)"
+            : "HTTP(S) JSON/API (inferred from traced URL)";
+          meta["HTTP Wire Version"] = "Not exposed to app trace (could be HTTP/1.1 or HTTP/2)";
+        }}
+        if (u.pathname) {{
+          meta["Path"] = u.pathname;
+        }}
+        if (fallback.note) {{
+          meta["Transport Note"] = fallback.note;
+        }}
+        return meta;
       }}
 
+      const PROMPT_BLOCKED_TEXT_RE = /this prompt was blocked by ai guard|prompt was blocked by zscaler ai guard/i;
+      const RESPONSE_BLOCKED_TEXT_RE = /this response was blocked by ai guard|response was blocked by zscaler ai guard/i;
+
+      const LOCAL_TOOL_TRANSPORT_META = Object.freeze({{
+        "Transport Type": "Local function execution",
+        "Traffic Class": "In-process tool call",
+        "Port": "N/A",
+        "Protocol / Scheme": "N/A",
+      }});
+
+      // Tools alternate above/below the main lane; their network hops sit just inside them.
+      const TOOL_NODE_LANES = [0, 4];
+      const TOOL_NETWORK_NODE_LANES = [1, 3];
+
+      const FLOW_BRANCH_LETTERS = "abcdefghijklmnopqrstuvwxyz";
+
+      // Trace entries are never mutated after they are recorded, so the graph and explainer data
+      // derived from one are cached per entry object (render, prior-trace deltas and export share them).
+      const flowGraphCache = new WeakMap();
+      const flowExplainDataCache = new WeakMap();
+
       function makeFlowGraph(entry) {{
+        if (!entry || typeof entry !== "object") return _buildFlowGraph(entry);
+        let graph = flowGraphCache.get(entry);
+        if (!graph) {{
+          graph = _buildFlowGraph(entry);
+          flowGraphCache.set(entry, graph);
+        }}
+        return graph;
+      }}
+
+      function _buildFlowGraph(entry) {{
         const nodes = [];
         const edges = [];
-        const seen = new Set();
+        const nodeById = new Map();
 
+        // meta may be a function returning the metadata; it is then only built on first hover.
         function addNode(id, label, kind, col, lane = null, meta = {{}}) {{
-          if (seen.has(id)) {{
-            const existing = nodes.find(n => n.id === id);
-            if (existing && meta && Object.keys(meta).length) {{
-              existing.meta = {{ ...(existing.meta || {{}}), ...meta }};
+          const existing = nodeById.get(id);
+          if (existing) {{
+            const extra = typeof meta === "function" ? meta() : meta;
+            if (extra && Object.keys(extra).length) {{
+              existing.meta = {{ ..._flowNodeMeta(existing), ...extra }};
             }}
             return;
           }}
-          seen.add(id);
-          nodes.push({{ id, label, kind, col, lane, meta }});
+          const node = typeof meta === "function"
+            ? {{ id, label, kind, col, lane, meta: null, metaBuilder: meta }}
+            : {{ id, label, kind, col, lane, meta }};
+          nodeById.set(id, node);
+          nodes.push(node);
         }}
         function addEdge(from, to, direction = "request", opts = {{}}) {{
           if (!from || !to) return;
@@ -8590,6 +9113,7 @@ HTML = f"""<!doctype html>
 
         const providerId = String(entry.provider || "ollama");
         const providerLabel = _providerLabel(providerId);
+        const providerEndpointHint = _providerUpstreamEndpoint(providerId);
         const body = entry.body && typeof entry.body === "object" ? entry.body : {{}};
         const trace = body.trace && typeof body.trace === "object" ? body.trace : {{}};
         const traceSteps = Array.isArray(trace.steps) ? trace.steps : [];
@@ -8605,13 +9129,9 @@ HTML = f"""<!doctype html>
         const perRoleWorkers = topology === "isolated_per_role";
         const guardrailsBlocked = !!guardrails.blocked;
         const guardrailsBlockStage = String(guardrails.stage || "").toUpperCase();
-        const responseTextForStage = String(body.response || body.error || "").toLowerCase();
-        const inferPromptBlockedByText =
-          responseTextForStage.includes("this prompt was blocked by ai guard")
-          || responseTextForStage.includes("prompt was blocked by zscaler ai guard");
-        const inferResponseBlockedByText =
-          responseTextForStage.includes("this response was blocked by ai guard")
-          || responseTextForStage.includes("response was blocked by zscaler ai guard");
+        const responseTextForStage = String(body.response || body.error || "");
+        const inferPromptBlockedByText = PROMPT_BLOCKED_TEXT_RE.test(responseTextForStage);
+        const inferResponseBlockedByText = RESPONSE_BLOCKED_TEXT_RE.test(responseTextForStage);
         const proxyPromptBlocked = proxyMode && guardrailsEnabled && guardrailsBlocked && (
           guardrailsBlockStage === "IN"
           || (guardrailsBlockStage !== "OUT" && inferPromptBlockedByText && !inferResponseBlockedByText)
@@ -8620,15 +9140,19 @@ HTML = f"""<!doctype html>
           guardrailsBlockStage === "OUT"
           || (guardrailsBlockStage !== "IN" && inferResponseBlockedByText)
         );
-        const aiGuardInStep = traceSteps.find((s) => String((s || {{}}).name || "").includes("AI Guard (IN)")) || null;
-        const aiGuardOutStep = traceSteps.find((s) => String((s || {{}}).name || "").includes("AI Guard (OUT)")) || null;
+        let aiGuardInStep = null;
+        let aiGuardOutStep = null;
+        let providerStep;
+        for (const s of traceSteps) {{
+          const n = s && s.name ? String(s.name) : "";
+          if (!n) continue;
+          if (!aiGuardInStep && n.includes("AI Guard (IN)")) aiGuardInStep = s;
+          if (!aiGuardOutStep && n.includes("AI Guard (OUT)")) aiGuardOutStep = s;
+          if (!providerStep && !n.startsWith("Zscaler")) providerStep = s;
+        }}
         const hasAiGuardIn = !!aiGuardInStep;
         const hasAiGuardOut = !!aiGuardOutStep;
         const dasApiMode = guardrailsEnabled && !proxyMode;
-        const providerStep = traceSteps.find((s) => {{
-          const n = String((s || {{}}).name || "");
-          return !!n && !n.startsWith("Zscaler");
-        }});
         const aiGuardInMs = _extractStepLatencyMs(aiGuardInStep);
         const aiGuardOutMs = _extractStepLatencyMs(aiGuardOutStep);
         const providerStepMs = _extractStepLatencyMs(providerStep);
@@ -8705,12 +9229,11 @@ HTML = f"""<!doctype html>
           // Keep DAS/API calls visually off the inline provider path.
           nextCol = 3;
         }} else if (proxyMode && guardrailsEnabled) {{
-          const upstreamEndpoint = _providerUpstreamEndpoint(providerId);
           addNode("aiguard_proxy", "Zscaler AI Guard", "aiguard", nextCol++, 2, {{
             "Mode": "Proxy",
             "Base URL": String(guardrails.proxy_base_url || ""),
             "Provider": providerLabel,
-            ...(upstreamEndpoint ? {{ "Next Hop (Upstream Provider)": upstreamEndpoint }} : {{}}),
+            ...(providerEndpointHint ? {{ "Next Hop (Upstream Provider)": providerEndpointHint }} : {{}}),
             ..._transportMetaFromUrl(String(guardrails.proxy_base_url || ""), {{
               note: "Proxy mode inline hop between app and provider"
             }}),
@@ -8720,12 +9243,30 @@ HTML = f"""<!doctype html>
           providerRequestSourceNode = "aiguard_proxy";
         }}
 
-        const pipelineStart = agentTrace.find((i) => (i && i.kind) === "multi_agent" && i.event === "pipeline_start");
-        const processHandoffLabel = perRoleWorkers ? "proc (per-role)" : "proc";
-        let firstSpecialistNodeId = "specialist_1";
-        if (pipelineStart) {{
-          const multiMeta = (((entry.body || {{}}).multi_agent) || {{}});
-          const spawnEvents = agentTrace.filter((i) => i && i.kind === "multi_agent" && i.event === "spawn_agent");
+        // One sweep over the agent trace for every kind/event this graph cares about.
+        let pipelineStart;
+        let mcpSnapshotEvent;
+        let mcpToolsListEvent;
+        const spawnEvents = [];
+        const mcpEvents = [];
+        const toolEvents = [];
+        for (const i of agentTrace) {{
+          const kind = i && i.kind;
+          if (kind === "tool") {{
+            toolEvents.push(i);
+          }} else if (kind === "mcp") {{
+            mcpEvents.push(i);
+            if (!mcpSnapshotEvent && i.event === "toolset.snapshot") mcpSnapshotEvent = i;
+            if (!mcpToolsListEvent && i.event === "tools_list") mcpToolsListEvent = i;
+          }} else if (kind === "multi_agent") {{
+            if (!pipelineStart && i.event === "pipeline_start") pipelineStart = i;
+            if (i.event === "spawn_agent") spawnEvents.push(i);
+          }}
+        }}
+        const processHandoffLabel = perRoleWorkers ? "proc (per-role)" : "proc";
+        let firstSpecialistNodeId = "specialist_1";
+        if (pipelineStart) {{
+          const multiMeta = (((entry.body || {{}}).multi_agent) || {{}});
           const plannedSpecialists = Array.isArray(multiMeta.spawned_agents) ? multiMeta.spawned_agents : [];
           const specialistSpecs = (spawnEvents.length ? spawnEvents : plannedSpecialists).slice(0, 4);
           const specialists = specialistSpecs.length ? specialistSpecs : [{{
@@ -8812,27 +9353,29 @@ HTML = f"""<!doctype html>
         }}
 
         const providerNodeId = "provider";
-        const providerMeta = providerStep ? {{
-          "Step": providerStep.name || providerLabel,
-          "URL": ((providerStep.request || {{}}).url || ""),
-          "Model": (((providerStep.request || {{}}).payload || {{}}).model || ""),
-          "Status": ((providerStep.response || {{}}).status ?? ""),
-          ...(() => {{
-            const hint = _providerUpstreamEndpoint(providerId);
-            return hint ? {{ "Default Provider Endpoint": hint }} : {{}};
-          }})(),
-          ..._transportMetaFromUrl(((providerStep.request || {{}}).url || ""), {{
+        let providerMeta;
+        if (providerStep) {{
+          const providerReqUrl = (providerStep.request || {{}}).url || "";
+          providerMeta = {{
+            "Step": providerStep.name || providerLabel,
+            "URL": providerReqUrl,
+            "Model": (((providerStep.request || {{}}).payload || {{}}).model || ""),
+            "Status": ((providerStep.response || {{}}).status ?? ""),
+          }};
+          if (providerEndpointHint) providerMeta["Default Provider Endpoint"] = providerEndpointHint;
+          Object.assign(providerMeta, _transportMetaFromUrl(providerReqUrl, {{
             note: "Provider request as observed by the demo app trace"
-          }}),
-          ..._extractGatewayDownstreamMeta(providerId, providerStep),
-        }} : {{
-          "Provider": providerLabel,
-          "Mode": proxyMode ? "Proxy" : "Direct",
-          ...(() => {{
-            const hint = _providerUpstreamEndpoint(providerId);
-            return hint ? {{ "Default Provider Endpoint": hint }} : {{}};
-          }})(),
-        }};
+          }}));
+          if (_isGatewayProvider(providerId)) {{
+            Object.assign(providerMeta, _extractGatewayDownstreamMeta(providerId, providerStep));
+          }}
+        }} else {{
+          providerMeta = {{
+            "Provider": providerLabel,
+            "Mode": proxyMode ? "Proxy" : "Direct",
+          }};
+          if (providerEndpointHint) providerMeta["Default Provider Endpoint"] = providerEndpointHint;
+        }}
         const inBlockedBeforeProvider = dasApiMode && guardrailsBlocked && guardrailsBlockStage === "IN" && !providerStep;
         const shouldShowProvider = true;
         const shouldConnectProviderRequest = !proxyPromptBlocked && !inBlockedBeforeProvider;
@@ -8847,14 +9390,9 @@ HTML = f"""<!doctype html>
             addEdge(providerRequestSourceNode, providerNodeId, "request", {{ latencyMs: providerHop.req }});
           }}
         }}
-        const mcpEvents = agentTrace.filter((i) => (i && i.kind) === "mcp");
-        const toolEvents = agentTrace.filter((i) => (i && i.kind) === "tool");
         const toolAnchor = pipelineStart ? firstSpecialistNodeId : (entry.agenticEnabled ? "agent" : providerNodeId);
         if (mcpEvents.length) {{
-          const toolsListEvent =
-            mcpEvents.find((i) => i.event === "toolset.snapshot")
-            || mcpEvents.find((i) => i.event === "tools_list")
-            || mcpEvents[0];
+          const toolsListEvent = mcpSnapshotEvent || mcpToolsListEvent || mcpEvents[0];
           const snapshotCounts = (toolsListEvent && toolsListEvent.counts && typeof toolsListEvent.counts === "object")
             ? toolsListEvent.counts
             : {{}};
@@ -8873,70 +9411,54 @@ HTML = f"""<!doctype html>
           addEdge("mcp", toolAnchor, "response");
         }}
 
-        const toolIds = [];
-        const toolNetworkIds = [];
+        const toolIds = new Array(toolEvents.length);
+        let toolNetworkCount = 0;
+        const toolCol = nextCol + 1;
         toolEvents.forEach((item, idx) => {{
           const toolName = String(item.tool || "").trim() || `tool_${{idx+1}}`;
           const id = `tool_${{idx}}`;
-          toolIds.push(id);
-          const outputPreview = _short(
-            typeof item.output === "string" ? item.output : _jsonPreview(item.output),
-            180
-          );
-          addNode(id, toolName, "tool", nextCol + 1 + idx, (idx % 2 === 0 ? 0 : 4), {{
-            "Tool": toolName,
-            "Agent": item.agent || "",
-            "Input": _jsonPreview(item.input),
-            "Output": outputPreview,
-            "Source": ((item.tool_trace || {{}}).source || "local"),
-            ...(() => {{
-              const tReq = ((item.tool_trace || {{}}).request || {{}}).url || "";
-              if (tReq) {{
-                return _transportMetaFromUrl(tReq, {{
-                  note: "Tool network call (if the tool made an HTTP request)"
-                }});
-              }}
-              return {{
-                "Transport Type": "Local function execution",
-                "Traffic Class": "In-process tool call",
-                "Port": "N/A",
-                "Protocol / Scheme": "N/A",
-              }};
-            }})(),
+          toolIds[idx] = id;
+          const tReq = ((item.tool_trace || {{}}).request || {{}}).url || "";
+          addNode(id, toolName, "tool", toolCol + idx, TOOL_NODE_LANES[idx & 1], () => {{
+            const toolMeta = {{
+              "Tool": toolName,
+              "Agent": item.agent || "",
+              "Input": _jsonPreview(item.input),
+              "Output": _short(typeof item.output === "string" ? item.output : _jsonPreview(item.output), 180),
+              "Source": ((item.tool_trace || {{}}).source || "local"),
+            }};
+            return Object.assign(toolMeta, tReq
+              ? _transportMetaFromUrl(tReq, {{ note: "Tool network call (if the tool made an HTTP request)" }})
+              : LOCAL_TOOL_TRANSPORT_META);
           }});
           const sourceNode = mcpEvents.length ? "mcp" : toolAnchor;
           addEdge(sourceNode, id, "request");
           addEdge(id, sourceNode, "response");
 
-          const tReq = ((item.tool_trace || {{}}).request || {{}}).url || "";
           if (tReq) {{
             const netId = `tool_net_${{idx}}`;
-            toolNetworkIds.push(netId);
-            let netHost = "network";
-            let netPath = "";
-            let netMethod = String(((item.tool_trace || {{}}).request || {{}}).method || "").toUpperCase();
-            try {{
-              const u = new URL(String(tReq));
-              netHost = u.host || u.hostname || netHost;
-              netPath = u.pathname || "";
-            }} catch {{}}
-            const tRes = ((item.tool_trace || {{}}).response || {{}}); 
-            addNode(netId, netHost, "provider", nextCol + 2 + idx, (idx % 2 === 0 ? 1 : 3), {{
-              "URL": tReq,
-              "Method": netMethod || "",
-              "Path": netPath,
-              "Status": (tRes.status ?? ""),
-              "Body Preview": _short(String(tRes.body_preview || tRes.body || ""), 220),
-              ..._transportMetaFromUrl(tReq, {{
-                note: "Tool outbound network destination"
-              }}),
+            toolNetworkCount += 1;
+            const u = _parseUrlCached(String(tReq));
+            const netHost = (u && (u.hostWithPort || u.host)) || "network";
+            addNode(netId, netHost, "provider", toolCol + 1 + idx, TOOL_NETWORK_NODE_LANES[idx & 1], () => {{
+              const tRes = ((item.tool_trace || {{}}).response || {{}});
+              return {{
+                "URL": tReq,
+                "Method": String(((item.tool_trace || {{}}).request || {{}}).method || "").toUpperCase(),
+                "Path": u ? u.pathname : "",
+                "Status": (tRes.status ?? ""),
+                "Body Preview": _short(String(tRes.body_preview || tRes.body || ""), 220),
+                ..._transportMetaFromUrl(tReq, {{
+                  note: "Tool outbound network destination"
+                }}),
+              }};
             }});
             addEdge(id, netId, "request");
             addEdge(netId, id, "response");
           }}
         }});
         if ((toolIds.length || mcpEvents.length) && shouldShowProvider && shouldConnectProviderRequest) {{
-          nextCol += 2 + Math.max(1, toolIds.length + toolNetworkIds.length);
+          nextCol += 2 + Math.max(1, toolIds.length + toolNetworkCount);
           const returnNode = toolIds.length ? toolIds[toolIds.length - 1] : "mcp";
           addEdge(returnNode, providerNodeId, "response");
         }}
@@ -8990,25 +9512,19 @@ HTML = f"""<!doctype html>
         }});
 
         // Keep per-node group indexing for edge lane offsets.
-        for (const direction of ["request", "response"]) {{
-          const dirEdges = edges.filter(e => e.direction === direction);
-          const groups = new Map();
-          const order = [];
-          for (const e of dirEdges) {{
-            const key = `${{e.from}}`;
-            if (!groups.has(key)) {{
-              groups.set(key, []);
-              order.push(key);
-            }}
-            groups.get(key).push(e);
-          }}
-          for (const key of order) {{
-            const list = groups.get(key) || [];
-            list.forEach((e, idx) => {{
-              e.flow_group_index = idx;
-              e.flow_group_size = list.length;
-            }});
-          }}
+        const edgeGroups = new Map();
+        for (const e of edges) {{
+          if (e.direction !== "request" && e.direction !== "response") continue;
+          const key = `${{e.direction}}|${{e.from}}`;
+          const list = edgeGroups.get(key);
+          if (list) list.push(e);
+          else edgeGroups.set(key, [e]);
+        }}
+        for (const list of edgeGroups.values()) {{
+          list.forEach((e, idx) => {{
+            e.flow_group_index = idx;
+            e.flow_group_size = list.length;
+          }});
         }}
 
         // Chronological request labeling with fan-out suffixes (a/b/c).
@@ -9020,14 +9536,13 @@ HTML = f"""<!doctype html>
           while (j < requestEdges.length && String(requestEdges[j].from || "") === anchorFrom) {{
             j += 1;
           }}
-          const burst = requestEdges.slice(i, j);
-          if (burst.length === 1) {{
-            burst[0].flow_label = String(reqCounter);
+          if (j - i === 1) {{
+            requestEdges[i].flow_label = String(reqCounter);
           }} else {{
-            burst.forEach((e, idx) => {{
-              const letter = String.fromCharCode(97 + idx);
-              e.flow_label = `${{reqCounter}}${{letter}}`;
-            }});
+            for (let k = i; k < j; k += 1) {{
+              const branch = k - i;
+              requestEdges[k].flow_label = `${{reqCounter}}${{FLOW_BRANCH_LETTERS[branch] || String.fromCharCode(97 + branch)}}`;
+            }}
           }}
           reqCounter += 1;
           i = j;
@@ -9068,8 +9583,21 @@ HTML = f"""<!doctype html>
         return {{ nodes, edges }};
       }}
 
+      const FLOW_FALLBACK_LANES = [0, 1, 3, 4];
+
+      function _copyFlowPositions(positions) {{
+        const copy = new Map();
+        for (const [id, p] of positions) copy.set(id, {{ x: p.x, y: p.y }});
+        return copy;
+      }}
+
       function _flowInitPositions(nodes) {{
-        const cols = Math.max(...nodes.map(n => Number(n.col || 0)), 0) + 1;
+        let maxCol = 0;
+        for (const n of nodes) {{
+          const col = Number(n.col || 0);
+          if (col > maxCol) maxCol = col;
+        }}
+        const cols = maxCol + 1;
         const colWidth = 310;
         const leftPad = 52;
         const laneYs = [84, 208, 356, 504, 652];
@@ -9082,7 +9610,7 @@ HTML = f"""<!doctype html>
         for (const n of nodes) {{
           let lane = Number.isInteger(n.lane) ? n.lane : null;
           if (lane == null) {{
-            lane = [0, 1, 3, 4][fallbackLaneIdx % 4];
+            lane = FLOW_FALLBACK_LANES[fallbackLaneIdx % FLOW_FALLBACK_LANES.length];
             fallbackLaneIdx += 1;
           }}
           const x = leftPad + (Number(n.col || 0) * colWidth);
@@ -9092,29 +9620,45 @@ HTML = f"""<!doctype html>
         return {{ positions, width, height, nodeW, nodeH }};
       }}
 
+      function _markFlowGeometryChanged(state) {{
+        state.geometryEpoch = (state.geometryEpoch || 0) + 1;
+      }}
+
       function _flowContentBounds(state) {{
         if (!state || !state.positions) {{
           return {{ minX: 0, minY: 0, maxX: 0, maxY: 0, width: 0, height: 0 }};
         }}
+        const epoch = state.geometryEpoch || 0;
+        if (state.contentBoundsCache && state.contentBoundsCache.epoch === epoch) {{
+          return state.contentBoundsCache.bounds;
+        }}
+        const bounds = _measureFlowContentBounds(state);
+        state.contentBoundsCache = {{ epoch, bounds }};
+        return bounds;
+      }}
+
+      function _measureFlowContentBounds(state) {{
         let minX = Infinity;
         let minY = Infinity;
         let maxX = -Infinity;
         let maxY = -Infinity;
 
-        (state.nodes || []).forEach((n) => {{
+        for (const n of (state.nodes || [])) {{
           const p = state.positions.get(n.id);
-          if (!p) return;
-          minX = Math.min(minX, p.x);
-          minY = Math.min(minY, p.y);
-          maxX = Math.max(maxX, p.x + state.nodeW);
-          maxY = Math.max(maxY, p.y + state.nodeH);
-        }});
-        (state.boundaries || []).forEach((b) => {{
-          minX = Math.min(minX, Number(b.x || 0));
-          minY = Math.min(minY, Number(b.y || 0));
-          maxX = Math.max(maxX, Number(b.x || 0) + Number(b.w || 0));
-          maxY = Math.max(maxY, Number(b.y || 0) + Number(b.h || 0));
-        }});
+          if (!p) continue;
+          if (p.x < minX) minX = p.x;
+          if (p.y < minY) minY = p.y;
+          if (p.x + state.nodeW > maxX) maxX = p.x + state.nodeW;
+          if (p.y + state.nodeH > maxY) maxY = p.y + state.nodeH;
+        }}
+        for (const b of (state.boundaries || [])) {{
+          const bx = Number(b.x || 0);
+          const by = Number(b.y || 0);
+          minX = Math.min(minX, bx);
+          minY = Math.min(minY, by);
+          maxX = Math.max(maxX, bx + Number(b.w || 0));
+          maxY = Math.max(maxY, by + Number(b.h || 0));
+        }}
         if (!Number.isFinite(minX) || !Number.isFinite(minY) || !Number.isFinite(maxX) || !Number.isFinite(maxY)) {{
           return {{
             minX: 0,
@@ -9142,6 +9686,18 @@ HTML = f"""<!doctype html>
       }}
 
       function _computeFlowBoundaries(state) {{
+        // Boundaries only move when node positions do; reuse them until the geometry epoch changes.
+        if (!state || !state.entry) return [];
+        const epoch = state.geometryEpoch || 0;
+        if (state.boundariesCache && state.boundariesCache.epoch === epoch && state.boundariesCache.entry === state.entry) {{
+          return state.boundariesCache.boundaries;
+        }}
+        const boundaries = _buildFlowBoundaries(state);
+        state.boundariesCache = {{ epoch, entry: state.entry, boundaries }};
+        return boundaries;
+      }}
+
+      function _buildFlowBoundaries(state) {{
         if (!state || !state.entry) return [];
         const topology = String(state.entry.executionTopology || "single_process").toLowerCase();
         const isolated = topology === "isolated_workers" || topology === "isolated_per_role";
@@ -9206,7 +9762,10 @@ HTML = f"""<!doctype html>
         }}];
       }}
 
-      function _flowEdgePath(a, b, edge, nodeW, nodeH, edgeIndex) {{
+      // Above this many edges, forward edges are drawn as straight segments instead of curves.
+      const FLOW_STRAIGHT_EDGE_THRESHOLD = 40;
+
+      function _flowEdgePath(a, b, edge, nodeW, nodeH, edgeIndex, straight = false) {{
         const req = edge.direction !== "response";
         const x1 = req ? (a.x + nodeW) : a.x;
         const x2 = req ? b.x : (b.x + nodeW);
@@ -9219,6 +9778,13 @@ HTML = f"""<!doctype html>
         const dy = y2 - y1;
         const ctrlSpread = Math.max(38, Math.min(140, Math.abs(dx) * 0.42));
         if ((req && x2 >= x1) || (!req && x2 <= x1)) {{
+          if (straight) {{
+            return {{
+              d: `M ${{x1}} ${{y1}} L ${{x2}} ${{y2}}`,
+              labelX: midX,
+              labelY: (y1 + y2) / 2 + (req ? -12 : 12),
+            }};
+          }}
           const c1x = x1 + (req ? ctrlSpread : -ctrlSpread);
           const c2x = x2 - (req ? ctrlSpread : -ctrlSpread);
           const bend = req ? -18 : 18;
@@ -9272,9 +9838,17 @@ HTML = f"""<!doctype html>
         flowGraphWrapEl.scrollTop = Math.max(0, Math.min(maxTop, targetTop));
       }}
 
+      function _flowNodeMeta(node) {{
+        if (!node.meta && node.metaBuilder) {{
+          node.meta = node.metaBuilder();
+          node.metaBuilder = null;
+        }}
+        return node.meta && typeof node.meta === "object" ? node.meta : {{}};
+      }}
+
       function _flowTooltipText(node) {{
         const lines = [`${{node.label}}`];
-        const meta = node.meta && typeof node.meta === "object" ? node.meta : {{}};
+        const meta = _flowNodeMeta(node);
         for (const [k, v] of Object.entries(meta)) {{
           if (v == null || v === "") continue;
           lines.push(`${{k}}: ${{typeof v === "string" ? _short(v, 220) : _short(_jsonPreview(v, 220), 220)}}`);
@@ -9282,19 +9856,46 @@ HTML = f"""<!doctype html>
         return lines.join("\\n");
       }}
 
+      function _openFlowTooltip(text, evt) {{
+        flowGraphTooltipEl.textContent = text;
+        flowGraphTooltipEl.style.display = "block";
+        // The text only changes here, so measure once and reuse the size while the pointer moves.
+        const tipRect = flowGraphTooltipEl.getBoundingClientRect();
+        flowTooltipSize = {{ width: tipRect.width, height: tipRect.height }};
+        _positionFlowTooltip(evt.clientX, evt.clientY);
+      }}
+
       function _showFlowTooltip(node, evt) {{
         if (!node) return;
-        flowGraphTooltipEl.textContent = _flowTooltipText(node);
-        flowGraphTooltipEl.style.display = "block";
-        _moveFlowTooltip(evt);
+        // Keyed by the meta object, so a node whose meta is replaced gets fresh text.
+        const metaKey = _flowNodeMeta(node);
+        let text = flowTooltipTextCache.get(metaKey);
+        if (text === undefined) {{
+          text = _flowTooltipText(node);
+          flowTooltipTextCache.set(metaKey, text);
+        }}
+        _openFlowTooltip(text, evt);
       }}
 
       function _moveFlowTooltip(evt) {{
-        if (flowGraphTooltipEl.style.display !== "block") return;
+        if (!flowTooltipSize) return;
+        // Pointer events can arrive several times per frame; only the latest position is drawn.
+        flowTooltipPointer = {{ clientX: evt.clientX, clientY: evt.clientY }};
+        if (flowTooltipRaf) return;
+        flowTooltipRaf = requestAnimationFrame(() => {{
+          flowTooltipRaf = 0;
+          if (flowTooltipSize && flowTooltipPointer) {{
+            _positionFlowTooltip(flowTooltipPointer.clientX, flowTooltipPointer.clientY);
+          }}
+        }});
+      }}
+
+      function _positionFlowTooltip(clientX, clientY) {{
+        if (flowGraphTooltipEl.style.display !== "block" || !flowTooltipSize) return;
         const wrapRect = flowGraphWrapEl.getBoundingClientRect();
-        const tipRect = flowGraphTooltipEl.getBoundingClientRect();
-        let x = (evt.clientX - wrapRect.left) + 12 + flowGraphWrapEl.scrollLeft;
-        let y = (evt.clientY - wrapRect.top) + 12 + flowGraphWrapEl.scrollTop;
+        const tipRect = flowTooltipSize;
+        let x = (clientX - wrapRect.left) + 12 + flowGraphWrapEl.scrollLeft;
+        let y = (clientY - wrapRect.top) + 12 + flowGraphWrapEl.scrollTop;
         const maxX = flowGraphWrapEl.scrollLeft + flowGraphWrapEl.clientWidth - tipRect.width - 8;
         const maxY = flowGraphWrapEl.scrollTop + flowGraphWrapEl.clientHeight - tipRect.height - 8;
         x = Math.min(Math.max(flowGraphWrapEl.scrollLeft + 8, x), Math.max(flowGraphWrapEl.scrollLeft + 8, maxX));
@@ -9305,6 +9906,12 @@ HTML = f"""<!doctype html>
 
       function _hideFlowTooltip() {{
         flowGraphTooltipEl.style.display = "none";
+        flowTooltipSize = null;
+        flowTooltipPointer = null;
+        if (flowTooltipRaf) {{
+          cancelAnimationFrame(flowTooltipRaf);
+          flowTooltipRaf = 0;
+        }}
       }}
 
       function _flowEdgeTooltipText(edge) {{
@@ -9322,192 +9929,335 @@ HTML = f"""<!doctype html>
       function _showFlowEdgeTooltip(edge, evt) {{
         const text = _flowEdgeTooltipText(edge);
         if (!text) return;
-        flowGraphTooltipEl.textContent = text;
-        flowGraphTooltipEl.style.display = "block";
-        _moveFlowTooltip(evt);
+        _openFlowTooltip(text, evt);
       }}
 
-      function refreshFlowGraphGeometry() {{
-        if (!flowGraphState) return;
+      const SVG_NS = "http://www.w3.org/2000/svg";
+      const FLOW_GRAPH_DEFS_HTML = `
+          <defs>
+            <marker id="flowArrowReq" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
+              <path d="M0,0 L10,5 L0,10 z" fill="#a78bfa"></path>
+            </marker>
+            <marker id="flowArrowResp" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
+              <path d="M0,0 L10,5 L0,10 z" fill="#22d3ee"></path>
+            </marker>
+            <marker id="flowArrowRespDanger" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
+              <path d="M0,0 L10,5 L0,10 z" fill="#ef4444"></path>
+            </marker>
+          </defs>
+        `;
+
+      function _svgEl(tag, cls = "") {{
+        const el = document.createElementNS(SVG_NS, tag);
+        if (cls) el.setAttribute("class", cls);
+        return el;
+      }}
+
+      function _svgAttrs(tag, attrs) {{
+        const el = document.createElementNS(SVG_NS, tag);
+        for (const k in attrs) el.setAttribute(k, String(attrs[k]));
+        return el;
+      }}
+
+      function _syncChildren(parentEl, els) {{
+        const children = parentEl.children;
+        if (children.length === els.length && els.every((el, i) => children[i] === el)) return;
+        parentEl.replaceChildren(...els);
+      }}
+
+      function _ensureFlowGraphDom() {{
+        if (flowGraphDom) return flowGraphDom;
+        flowGraphSvgEl.innerHTML = FLOW_GRAPH_DEFS_HTML;
+        const boundariesEl = _svgEl("g", "flow-boundaries");
+        const edgesEl = _svgEl("g", "flow-edges");
+        const edgeLabelsEl = _svgEl("g", "flow-edge-labels");
+        const nodesEl = _svgEl("g", "flow-nodes");
+        flowGraphSvgEl.append(boundariesEl, edgesEl, edgeLabelsEl, nodesEl);
+        flowGraphDom = {{
+          boundariesEl,
+          edgesEl,
+          edgeLabelsEl,
+          nodesEl,
+          nodeEls: new Map(),
+          edgeEls: [],
+          boundaryEls: new Map(),
+        }};
+        return flowGraphDom;
+      }}
+
+      function _createFlowNodeEls(nodeId) {{
+        const g = _svgEl("g");
+        g.setAttribute("data-node-id", nodeId);
+        const rect = _svgEl("rect");
+        rect.setAttribute("rx", "9");
+        rect.setAttribute("ry", "9");
+        const text = _svgEl("text");
+        text.setAttribute("y", "22");
+        text.setAttribute("text-anchor", "middle");
+        g.append(rect, text);
+        return {{ g, rect, text }};
+      }}
+
+      function _createFlowEdgeEls(idx) {{
+        const path = _svgEl("path");
+        path.setAttribute("data-edge-idx", String(idx));
+        const labelG = _svgEl("g");
+        labelG.setAttribute("data-edge-label-idx", String(idx));
+        const rect = _svgEl("rect");
+        rect.setAttribute("height", "18");
+        rect.setAttribute("rx", "6");
+        rect.setAttribute("ry", "6");
+        const text = _svgEl("text");
+        labelG.append(rect, text);
+        return {{ path, labelG, rect, text, labelW: 30 }};
+      }}
+
+      // Drag moves are applied at most once per frame; a pending frame is applied immediately
+      // when the drag ends so the final position is never dropped.
+      function _flushFlowDragFrame(nodeId) {{
+        if (!flowDragRaf) return;
+        cancelAnimationFrame(flowDragRaf);
+        flowDragRaf = 0;
+        refreshFlowGraphGeometry(nodeId);
+      }}
+
+      // Node and edge-label interaction is delegated to the SVG root, so retained elements carry
+      // no listeners of their own. mouseover/mouseout stand in for the non-bubbling enter/leave.
+      function _flowHoverTarget(target) {{
+        return target && target.closest ? target.closest(".flow-node[data-node-id], [data-edge-label-idx]") : null;
+      }}
+
+      function _onFlowGraphMouseOver(evt) {{
+        const el = _flowHoverTarget(evt.target);
+        if (!el || el === flowHoverEl) return;
+        flowHoverEl = el;
         const state = flowGraphState;
-        state.boundaries = _computeFlowBoundaries(state);
-        flowGraphSvgEl.querySelectorAll(".flow-node").forEach((el) => {{
-          const nodeId = el.getAttribute("data-node-id");
-          const p = state.positions.get(nodeId);
-          if (!p) return;
-          el.setAttribute("transform", `translate(${{p.x}},${{p.y}})`);
+        if (!state) return;
+        if (el.hasAttribute("data-node-id")) {{
+          _showFlowTooltip(state.nodeById.get(el.getAttribute("data-node-id")), evt);
+        }} else {{
+          const edge = state.edges[Number(el.getAttribute("data-edge-label-idx"))];
+          if (edge) _showFlowEdgeTooltip(edge, evt);
+        }}
+      }}
+
+      function _onFlowGraphMouseOut(evt) {{
+        if (!flowHoverEl || (evt.relatedTarget && flowHoverEl.contains(evt.relatedTarget))) return;
+        flowHoverEl = null;
+        _hideFlowTooltip();
+      }}
+
+      function _onFlowGraphPointerDown(evt) {{
+        const g = evt.target.closest ? evt.target.closest(".flow-node[data-node-id]") : null;
+        if (!g) return;
+        evt.preventDefault();
+        g.setPointerCapture(evt.pointerId);
+        const nodeId = g.getAttribute("data-node-id");
+        const p = flowGraphState && flowGraphState.positions.get(nodeId);
+        if (!p) return;
+        flowGraphDragState = {{
+          pointerId: evt.pointerId,
+          nodeId,
+          el: g,
+          startClientX: evt.clientX,
+          startClientY: evt.clientY,
+          startX: p.x,
+          startY: p.y,
+        }};
+        g.classList.add("dragging");
+        _hideFlowTooltip();
+      }}
+
+      function _onFlowGraphPointerMove(evt) {{
+        const state = flowGraphState;
+        const drag = flowGraphDragState;
+        if (!drag) {{
+          if (flowHoverEl) _moveFlowTooltip(evt);
+          return;
+        }}
+        if (!state || drag.pointerId !== evt.pointerId) return;
+        const nodeId = drag.nodeId;
+        const dx = (evt.clientX - drag.startClientX) / state.scale;
+        const dy = (evt.clientY - drag.startClientY) / state.scale;
+        const maxX = Math.max(8, state.width - state.nodeW - 8);
+        const maxY = Math.max(8, state.height - state.nodeH - 8);
+        state.positions.set(nodeId, {{
+          x: Math.min(maxX, Math.max(8, drag.startX + dx)),
+          y: Math.min(maxY, Math.max(8, drag.startY + dy)),
         }});
-        flowGraphSvgEl.querySelectorAll("path[data-edge-idx]").forEach((el) => {{
-          const idx = Number(el.getAttribute("data-edge-idx") || "-1");
-          const edge = state.edges[idx];
-          if (!edge) return;
-          const a = state.positions.get(edge.from);
-          const b = state.positions.get(edge.to);
-          if (!a || !b) return;
-          const geom = _flowEdgePath(a, b, edge, state.nodeW, state.nodeH, idx);
-          el.setAttribute("d", geom.d);
-          const labelGroup = flowGraphSvgEl.querySelector(`.flow-edge-label[data-edge-label-idx="${{idx}}"]`);
-          if (labelGroup) {{
-            const labelText = String(edge.display_label || edge.flow_label || "");
-            const labelW = Math.max(30, Math.min(240, 14 + (labelText.length * 7)));
-            const rect = labelGroup.querySelector("rect");
-            const text = labelGroup.querySelector("text");
-            if (rect) {{
-              rect.setAttribute("x", String(geom.labelX - (labelW / 2)));
-              rect.setAttribute("y", String(geom.labelY - 9));
-              rect.setAttribute("width", String(labelW));
-            }}
-            if (text) {{
-              text.setAttribute("x", String(geom.labelX));
-              text.setAttribute("y", String(geom.labelY));
-              text.textContent = labelText;
+        _markFlowGeometryChanged(state);
+        if (flowDragRaf) return;
+        flowDragRaf = requestAnimationFrame(() => {{
+          flowDragRaf = 0;
+          refreshFlowGraphGeometry(nodeId);
+        }});
+      }}
+
+      function _onFlowGraphPointerEnd(evt) {{
+        const drag = flowGraphDragState;
+        if (!drag || (evt.type === "pointerup" && drag.pointerId !== evt.pointerId)) return;
+        _flushFlowDragFrame(drag.nodeId);
+        flowGraphDragState = null;
+        drag.el.classList.remove("dragging");
+      }}
+
+      function _bindFlowGraphEvents() {{
+        flowGraphSvgEl.addEventListener("mouseover", _onFlowGraphMouseOver);
+        flowGraphSvgEl.addEventListener("mouseout", _onFlowGraphMouseOut);
+        flowGraphSvgEl.addEventListener("pointerdown", _onFlowGraphPointerDown);
+        flowGraphSvgEl.addEventListener("pointermove", _onFlowGraphPointerMove);
+        flowGraphSvgEl.addEventListener("pointerup", _onFlowGraphPointerEnd);
+        flowGraphSvgEl.addEventListener("pointercancel", _onFlowGraphPointerEnd);
+      }}
+
+      function _createFlowBoundaryEls(boundaryId) {{
+        const g = _svgEl("g", "flow-boundary");
+        g.setAttribute("data-boundary-id", boundaryId);
+        const rect = _svgEl("rect");
+        rect.setAttribute("rx", "12");
+        rect.setAttribute("ry", "12");
+        const text = _svgEl("text");
+        text.setAttribute("text-anchor", "start");
+        g.append(rect, text);
+        return {{ g, rect, text }};
+      }}
+
+      function _flowEdgeIndicesByNode(state) {{
+        if (!state.edgeIndicesByNode) {{
+          const byNode = new Map();
+          state.edges.forEach((edge, idx) => {{
+            for (const nodeId of [edge.from, edge.to]) {{
+              const list = byNode.get(nodeId);
+              if (list) list.push(idx);
+              else byNode.set(nodeId, [idx]);
             }}
+          }});
+          state.edgeIndicesByNode = byNode;
+        }}
+        return state.edgeIndicesByNode;
+      }}
+
+      function _applyFlowEdgeGeometry(state, dom, idx, straight) {{
+        const els = dom.edgeEls[idx];
+        const edge = state.edges[idx];
+        if (!els || !edge) return;
+        const a = state.positions.get(edge.from);
+        const b = state.positions.get(edge.to);
+        if (!a || !b) return;
+        const geom = _flowEdgePath(a, b, edge, state.nodeW, state.nodeH, idx, straight);
+        els.path.setAttribute("d", geom.d);
+        els.rect.setAttribute("x", String(geom.labelX - (els.labelW / 2)));
+        els.rect.setAttribute("y", String(geom.labelY - 9));
+        els.text.setAttribute("x", String(geom.labelX));
+        els.text.setAttribute("y", String(geom.labelY));
+      }}
+
+      // With movedNodeId set (node drag), only that node, its own edges and the boundaries are
+      // touched; otherwise every element is repositioned.
+      function _applyFlowGraphGeometry(state, dom, movedNodeId = null) {{
+        const straight = state.edges.length > FLOW_STRAIGHT_EDGE_THRESHOLD;
+        if (movedNodeId != null) {{
+          const els = dom.nodeEls.get(movedNodeId);
+          const p = state.positions.get(movedNodeId);
+          if (els && p) els.g.setAttribute("transform", `translate(${{p.x}},${{p.y}})`);
+          for (const idx of (_flowEdgeIndicesByNode(state).get(movedNodeId) || [])) {{
+            _applyFlowEdgeGeometry(state, dom, idx, straight);
           }}
-        }});
-        (state.boundaries || []).forEach((b) => {{
-          const g = flowGraphSvgEl.querySelector(`.flow-boundary[data-boundary-id="${{b.id}}"]`);
-          if (!g) return;
-          const rect = g.querySelector("rect");
-          const text = g.querySelector("text");
-          if (rect) {{
-            rect.setAttribute("x", String(b.x));
-            rect.setAttribute("y", String(b.y));
-            rect.setAttribute("width", String(b.w));
-            rect.setAttribute("height", String(b.h));
-          }}
-          if (text) {{
-            text.setAttribute("x", String(b.x + 12));
-            text.setAttribute("y", String(b.y + 18));
+        }} else {{
+          dom.nodeEls.forEach((els, nodeId) => {{
+            const p = state.positions.get(nodeId);
+            if (p) els.g.setAttribute("transform", `translate(${{p.x}},${{p.y}})`);
+          }});
+          for (let idx = 0; idx < state.edges.length; idx += 1) {{
+            _applyFlowEdgeGeometry(state, dom, idx, straight);
           }}
+        }}
+        (state.boundaries || []).forEach((b) => {{
+          const els = dom.boundaryEls.get(b.id);
+          if (!els) return;
+          els.rect.setAttribute("x", String(b.x));
+          els.rect.setAttribute("y", String(b.y));
+          els.rect.setAttribute("width", String(b.w));
+          els.rect.setAttribute("height", String(b.h));
+          els.text.setAttribute("x", String(b.x + 12));
+          els.text.setAttribute("y", String(b.y + 18));
         }});
       }}
 
+      function refreshFlowGraphGeometry(movedNodeId = null) {{
+        if (!flowGraphState || !flowGraphDom) return;
+        const state = flowGraphState;
+        state.boundaries = _computeFlowBoundaries(state);
+        _applyFlowGraphGeometry(state, flowGraphDom, movedNodeId);
+      }}
+
       function drawFlowGraph() {{
         if (!flowGraphState) {{
           resetFlowGraph();
           return;
         }}
         const state = flowGraphState;
-        const esc = (s) => String(s).replaceAll("&","&amp;").replaceAll("<","&lt;").replaceAll(">","&gt;");
+        const dom = _ensureFlowGraphDom();
         const nodeW = state.nodeW;
         const nodeH = state.nodeH;
-        const edgeParts = state.edges.map((edge, idx) => {{
-          const a = state.positions.get(edge.from);
-          const b = state.positions.get(edge.to);
-          if (!a || !b) return null;
-          const geom = _flowEdgePath(a, b, edge, nodeW, nodeH, idx);
-          const cls = `flow-edge ${{edge.direction === "response" ? "response" : "request"}} ${{edge.style === "solid" ? "solid" : ""}} ${{edge.danger ? "danger" : ""}}`;
+
+        // Nodes: keep the element for every id still in the graph, create the new ones.
+        const nextNodeEls = new Map();
+        for (const n of state.nodes) {{
+          if (nextNodeEls.has(n.id) || !state.positions.get(n.id)) continue;
+          const els = dom.nodeEls.get(n.id) || _createFlowNodeEls(n.id);
+          els.g.setAttribute("class", `flow-node ${{flowNodeClass(n.kind)}}`);
+          els.rect.setAttribute("width", String(nodeW));
+          els.rect.setAttribute("height", String(nodeH));
+          els.text.setAttribute("x", String(nodeW / 2));
+          els.text.textContent = String(n.label);
+          nextNodeEls.set(n.id, els);
+        }}
+        dom.nodeEls = nextNodeEls;
+
+        // Edges are keyed by index; an edge whose endpoints have no position is not drawn.
+        const pathEls = [];
+        const labelEls = [];
+        let respCount = 0;
+        state.edges.forEach((edge, idx) => {{
+          if (edge.direction === "response") respCount += 1;
+          if (!state.positions.get(edge.from) || !state.positions.get(edge.to)) return;
+          const els = dom.edgeEls[idx] || (dom.edgeEls[idx] = _createFlowEdgeEls(idx));
+          const dirCls = edge.direction === "response" ? "response" : "request";
+          els.path.setAttribute("class", `flow-edge ${{dirCls}} ${{edge.style === "solid" ? "solid" : ""}} ${{edge.danger ? "danger" : ""}}`);
+          els.path.setAttribute("marker-end", `url(#flowArrow${{edge.direction === "response" ? (edge.danger ? "RespDanger" : "Resp") : "Req"}})`);
+          pathEls.push(els.path);
           const labelText = String(edge.display_label || edge.flow_label || "");
-          const labelW = Math.max(30, Math.min(240, 14 + (labelText.length * 7)));
-          const labelCls = `flow-edge-label ${{edge.direction === "response" ? "response" : "request"}} ${{edge.danger ? "danger" : ""}} ${{edge.delta_class || ""}}`;
-          return {{
-            path: `<path data-edge-idx="${{idx}}" class="${{cls}}" d="${{geom.d}}" marker-end="url(#flowArrow${{edge.direction === "response" ? (edge.danger ? "RespDanger" : "Resp") : "Req"}})"></path>`,
-            label: labelText
-              ? `<g class="${{labelCls}}" data-edge-label-idx="${{idx}}"><rect x="${{geom.labelX - (labelW / 2)}}" y="${{geom.labelY - 9}}" width="${{labelW}}" height="18" rx="6" ry="6"></rect><text x="${{geom.labelX}}" y="${{geom.labelY}}">${{esc(labelText)}}</text></g>`
-              : "",
-          }};
-        }}).filter(Boolean);
-        const edgeSvg = edgeParts.map(p => p.path).join("");
-        const edgeLabelSvg = edgeParts.map(p => p.label || "").join("");
-        state.boundaries = _computeFlowBoundaries(state);
-        const boundarySvg = (state.boundaries || []).map((b) => `
-          <g class="flow-boundary" data-boundary-id="${{esc(b.id)}}">
-            <rect x="${{b.x}}" y="${{b.y}}" width="${{b.w}}" height="${{b.h}}" rx="12" ry="12"></rect>
-            <text x="${{b.x + 12}}" y="${{b.y + 18}}" text-anchor="start">${{esc(b.label)}}</text>
-          </g>
-        `).join("");
+          if (!labelText) return;
+          els.labelW = Math.max(30, Math.min(240, 14 + (labelText.length * 7)));
+          els.labelG.setAttribute("class", `flow-edge-label ${{dirCls}} ${{edge.danger ? "danger" : ""}} ${{edge.delta_class || ""}}`);
+          els.rect.setAttribute("width", String(els.labelW));
+          els.text.textContent = labelText;
+          labelEls.push(els.labelG);
+        }});
+        dom.edgeEls.length = state.edges.length;
 
-        const nodeSvg = state.nodes.map((n) => {{
-          const p = state.positions.get(n.id);
-          if (!p) return "";
-          return `
-            <g class="flow-node ${{flowNodeClass(n.kind)}}" data-node-id="${{esc(n.id)}}" transform="translate(${{p.x}},${{p.y}})">
-              <rect rx="9" ry="9" width="${{nodeW}}" height="${{nodeH}}"></rect>
-              <text x="${{nodeW / 2}}" y="22" text-anchor="middle">${{esc(n.label)}}</text>
-            </g>
-          `;
-        }}).join("");
+        state.boundaries = _computeFlowBoundaries(state);
+        const nextBoundaryEls = new Map();
+        for (const b of state.boundaries) {{
+          const els = dom.boundaryEls.get(b.id) || _createFlowBoundaryEls(b.id);
+          els.text.textContent = String(b.label);
+          nextBoundaryEls.set(b.id, els);
+        }}
+        dom.boundaryEls = nextBoundaryEls;
 
         flowGraphSvgEl.setAttribute("viewBox", `0 0 ${{state.width}} ${{state.height}}`);
         flowGraphSvgEl.setAttribute("width", String(Math.round(state.width * state.scale)));
         flowGraphSvgEl.setAttribute("height", String(Math.round(state.height * state.scale)));
-        flowGraphSvgEl.innerHTML = `
-          <defs>
-            <marker id="flowArrowReq" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
-              <path d="M0,0 L10,5 L0,10 z" fill="#a78bfa"></path>
-            </marker>
-            <marker id="flowArrowResp" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
-              <path d="M0,0 L10,5 L0,10 z" fill="#22d3ee"></path>
-            </marker>
-            <marker id="flowArrowRespDanger" markerWidth="10" markerHeight="10" refX="8" refY="5" orient="auto">
-              <path d="M0,0 L10,5 L0,10 z" fill="#ef4444"></path>
-            </marker>
-          </defs>
-          <g class="flow-boundaries">${{boundarySvg}}</g>
-          <g class="flow-edges">${{edgeSvg}}</g>
-          <g class="flow-edge-labels">${{edgeLabelSvg}}</g>
-          <g class="flow-nodes">${{nodeSvg}}</g>
-        `;
-
-        const nodeById = new Map(state.nodes.map(n => [n.id, n]));
-        flowGraphSvgEl.querySelectorAll(".flow-node").forEach((el) => {{
-          const nodeId = el.getAttribute("data-node-id");
-          const node = nodeById.get(nodeId);
-          el.addEventListener("mouseenter", (evt) => _showFlowTooltip(node, evt));
-          el.addEventListener("mousemove", (evt) => _moveFlowTooltip(evt));
-          el.addEventListener("mouseleave", () => _hideFlowTooltip());
-          el.addEventListener("pointerdown", (evt) => {{
-            evt.preventDefault();
-            el.setPointerCapture(evt.pointerId);
-            const p = state.positions.get(nodeId);
-            if (!p) return;
-            flowGraphDragState = {{
-              pointerId: evt.pointerId,
-              nodeId,
-              startClientX: evt.clientX,
-              startClientY: evt.clientY,
-              startX: p.x,
-              startY: p.y,
-            }};
-            el.classList.add("dragging");
-            _hideFlowTooltip();
-          }});
-          el.addEventListener("pointermove", (evt) => {{
-            if (!flowGraphDragState || flowGraphDragState.pointerId !== evt.pointerId || flowGraphDragState.nodeId !== nodeId) return;
-            const dx = (evt.clientX - flowGraphDragState.startClientX) / state.scale;
-            const dy = (evt.clientY - flowGraphDragState.startClientY) / state.scale;
-            const maxX = Math.max(8, state.width - state.nodeW - 8);
-            const maxY = Math.max(8, state.height - state.nodeH - 8);
-            state.positions.set(nodeId, {{
-              x: Math.min(maxX, Math.max(8, flowGraphDragState.startX + dx)),
-              y: Math.min(maxY, Math.max(8, flowGraphDragState.startY + dy)),
-            }});
-            refreshFlowGraphGeometry();
-          }});
-          el.addEventListener("pointerup", (evt) => {{
-            if (flowGraphDragState && flowGraphDragState.pointerId === evt.pointerId) {{
-              flowGraphDragState = null;
-            }}
-            el.classList.remove("dragging");
-          }});
-          el.addEventListener("pointercancel", () => {{
-            flowGraphDragState = null;
-            el.classList.remove("dragging");
-          }});
-        }});
-        flowGraphSvgEl.querySelectorAll(".flow-edge-label[data-edge-label-idx]").forEach((labelEl) => {{
-          const idx = Number(labelEl.getAttribute("data-edge-label-idx") || "-1");
-          const edge = state.edges[idx];
-          if (!edge) return;
-          labelEl.addEventListener("mouseenter", (evt) => _showFlowEdgeTooltip(edge, evt));
-          labelEl.addEventListener("mousemove", (evt) => _moveFlowTooltip(evt));
-          labelEl.addEventListener("mouseleave", () => _hideFlowTooltip());
-        }});
+        _syncChildren(dom.boundariesEl, Array.from(nextBoundaryEls.values(), (els) => els.g));
+        _syncChildren(dom.edgesEl, pathEls);
+        _syncChildren(dom.edgeLabelsEl, labelEls);
+        _syncChildren(dom.nodesEl, Array.from(nextNodeEls.values(), (els) => els.g));
+        _applyFlowGraphGeometry(state, dom);
 
         flowGraphEmptyEl.style.display = "none";
         flowGraphSvgEl.style.display = "block";
-        const reqCount = state.edges.filter(e => e.direction !== "response").length;
-        const respCount = state.edges.filter(e => e.direction === "response").length;
+        const reqCount = state.edges.length - respCount;
         flowToolbarStatusEl.textContent = `Nodes: ${{state.nodes.length}} | Request flows: ${{reqCount}} | Return flows: ${{respCount}} | Zoom: ${{Math.round(state.scale * 100)}}%`;
       }}
 
@@ -9519,10 +10269,20 @@ HTML = f"""<!doctype html>
         if (flowPreviewWatermarkEl) {{
           flowPreviewWatermarkEl.style.display = entry.is_preview ? "flex" : "none";
         }}
+        const previewSig = entry.is_preview ? _plannedFlowSignature(entry) : "";
+        if (previewSig && flowGraphState && flowGraphState.previewSig === previewSig) {{
+          // Typing in the prompt box re-plans the preview on every keystroke; only the browser
+          // node's "Prompt" field can differ, so patch it and keep the current layout.
+          flowGraphState.entry = entry;
+          const clientNode = flowGraphState.nodeById && flowGraphState.nodeById.get("client");
+          if (clientNode) clientNode.meta = {{ ..._flowNodeMeta(clientNode), "Prompt": entry.prompt || "" }};
+          return;
+        }}
         const graph = makeFlowGraph(entry);
-        const nodes = Array.isArray(graph.nodes) ? graph.nodes : [];
-        const edges = Array.isArray(graph.edges) ? graph.edges : [];
-        const selectedIdx = Array.isArray(traceHistory) ? traceHistory.indexOf(entry) : -1;
+        // The cached graph is shared; latency deltas and the preview prompt patch write to copies.
+        const nodes = Array.isArray(graph.nodes) ? graph.nodes.map((n) => ({{ ...n }})) : [];
+        const edges = Array.isArray(graph.edges) ? graph.edges.map((e) => ({{ ...e }})) : [];
+        const selectedIdx = traceHistory[selectedTraceIndex] === entry ? selectedTraceIndex : traceHistory.indexOf(entry);
         const priorEntry = (selectedIdx >= 0 && Array.isArray(traceHistory) && traceHistory.length > selectedIdx + 1)
           ? traceHistory[selectedIdx + 1]
           : null;
@@ -9545,10 +10305,12 @@ HTML = f"""<!doctype html>
         const init = _flowInitPositions(nodes);
         flowGraphState = {{
           entry,
+          previewSig,
           nodes,
           edges,
+          nodeById: new Map(nodes.map((n) => [n.id, n])),
           positions: init.positions,
-          initialPositions: new Map(Array.from(init.positions.entries()).map(([k, v]) => [k, {{...v}}])),
+          initialPositions: _copyFlowPositions(init.positions),
           width: init.width,
           height: init.height,
           nodeW: init.nodeW,
@@ -9561,16 +10323,14 @@ HTML = f"""<!doctype html>
 
       function _hostFromUrl(urlText) {{
         if (!urlText) return "";
-        try {{
-          return new URL(String(urlText)).host || "";
-        }} catch {{
-          return "";
-        }}
+        const u = _parseUrlCached(String(urlText));
+        return u ? u.hostWithPort : "";
       }}
 
       function _isLikelyToolError(toolItem) {{
         const output = String(toolItem?.output || "");
-        if (output.toLowerCase().startsWith("error:")) return true;
+        // Only the prefix is compared, so long tool output is not lower-cased in full.
+        if (output.slice(0, 6).toLowerCase() === "error:") return true;
         if (toolItem?.tool_trace?.error) return true;
         if (toolItem?.error) return true;
         return false;
@@ -9578,7 +10338,9 @@ HTML = f"""<!doctype html>
 
       function _extractUsageTokens(stepBody) {{
         if (!stepBody || typeof stepBody !== "object") return {{ in: 0, out: 0 }};
-        const usage = stepBody.usage && typeof stepBody.usage === "object" ? stepBody.usage : {{}};
+        const usage = stepBody.usage;
+        // Guardrail and tool steps carry no usage block; skip the field probing for them.
+        if (!usage || typeof usage !== "object") return {{ in: 0, out: 0 }};
         const inTokens = Number(
           usage.input_tokens
           ?? usage.prompt_tokens
@@ -9596,21 +10358,26 @@ HTML = f"""<!doctype html>
         return {{ in: inTokens, out: outTokens }};
       }}
 
+      const LATENCY_NS_FIELDS = Object.freeze(["total_duration", "eval_duration", "prompt_eval_duration", "load_duration"]);
+      const LATENCY_MS_FIELDS = Object.freeze(["latency_ms", "duration_ms", "elapsed_ms"]);
+
       function _extractLatencyMs(stepBody) {{
         if (!stepBody || typeof stepBody !== "object") return 0;
-        const nsFields = ["total_duration", "eval_duration", "prompt_eval_duration", "load_duration"];
         let ns = 0;
-        nsFields.forEach((k) => {{
-          const v = Number(stepBody[k] || 0);
+        for (const k of LATENCY_NS_FIELDS) {{
+          const raw = stepBody[k];
+          if (!raw) continue;
+          const v = Number(raw);
           if (Number.isFinite(v) && v > 0) ns += v;
-        }});
+        }}
         if (ns > 0) return Math.round(ns / 1e6);
-        const msFields = ["latency_ms", "duration_ms", "elapsed_ms"];
         let ms = 0;
-        msFields.forEach((k) => {{
-          const v = Number(stepBody[k] || 0);
+        for (const k of LATENCY_MS_FIELDS) {{
+          const raw = stepBody[k];
+          if (!raw) continue;
+          const v = Number(raw);
           if (Number.isFinite(v) && v > 0) ms += v;
-        }});
+        }}
         return Math.round(ms);
       }}
 
@@ -9812,6 +10579,16 @@ HTML = f"""<!doctype html>
       }}
 
       function _buildFlowExplainData(entry) {{
+        if (!entry || typeof entry !== "object") return _computeFlowExplainData(entry);
+        let data = flowExplainDataCache.get(entry);
+        if (!data) {{
+          data = _computeFlowExplainData(entry);
+          flowExplainDataCache.set(entry, data);
+        }}
+        return data;
+      }}
+
+      function _computeFlowExplainData(entry) {{
         const body = (entry && typeof entry.body === "object") ? entry.body : {{}};
         const trace = (body && typeof body.trace === "object") ? body.trace : {{}};
         const traceSteps = Array.isArray(trace.steps) ? trace.steps : [];
@@ -9821,7 +10598,45 @@ HTML = f"""<!doctype html>
         ];
         const roleSummaries = buildAgentRoleSummary(agentTrace);
         const multiAgentMeta = (body.multi_agent && typeof body.multi_agent === "object") ? body.multi_agent : {{}};
-        const spawnEvents = agentTrace.filter((i) => i && i.kind === "multi_agent" && i.event === "spawn_agent");
+        // One sweep over the agent trace collects spawns, the toolset snapshot, tool counts and the
+        // spawn/tool timeline rows (appended after the trace-step rows below).
+        const spawnEvents = [];
+        const spawnTimeline = [];
+        const toolTimeline = [];
+        let chatStartSnapshot = null;
+        let firstSnapshot = null;
+        let toolCount = 0;
+        let networkToolCount = 0;
+        let toolErrors = 0;
+        for (let i = 0; i < agentTrace.length; i += 1) {{
+          const item = agentTrace[i];
+          if (!item) continue;
+          if (item.kind === "tool") {{
+            toolCount += 1;
+            const tUrl = String(item.tool_trace?.request?.url || "").trim();
+            if (tUrl) networkToolCount += 1;
+            const isError = _isLikelyToolError(item);
+            if (isError) toolErrors += 1;
+            const tHost = tUrl ? _hostFromUrl(tUrl) : "";
+            toolTimeline.push({{
+              title: `Tool ${{toolCount}}. ${{String(item.tool || `tool_${{toolCount}}`)}}`,
+              meta: `result=${{isError ? "error" : "ok"}} | ${{tHost ? `dest=${{tHost}}` : "dest=local"}}`,
+            }});
+          }} else if (item.kind === "multi_agent" && item.event === "spawn_agent") {{
+            spawnEvents.push(item);
+            spawnTimeline.push({{
+              title: `Agent ${{spawnEvents.length}}. Spawn ${{String(item.label || item.to_agent || "Specialist")}}`,
+              meta: [
+                item.task ? `task=${{String(item.task)}}` : "",
+                item.tools_enabled_for_agent || item.tools_allowed ? "tools=allowed" : "tools=not requested",
+              ].filter(Boolean).join(" | ") || "specialist selected by orchestrator",
+            }});
+          }}
+          if (item.event === "toolset.snapshot") {{
+            if (!firstSnapshot) firstSnapshot = item;
+            if (!chatStartSnapshot && item.stage === "chat_start") chatStartSnapshot = item;
+          }}
+        }}
         const spawnedAgents = (spawnEvents.length ? spawnEvents : (Array.isArray(multiAgentMeta.spawned_agents) ? multiAgentMeta.spawned_agents : []))
           .map((i) => ({{
             label: String(i?.label || i?.to_agent || i?.role || "Specialist"),
@@ -9829,9 +10644,42 @@ HTML = f"""<!doctype html>
             tools: !!(i?.tools_enabled_for_agent || i?.tools_allowed),
           }}));
         const guardrails = (body.guardrails && typeof body.guardrails === "object") ? body.guardrails : {{}};
-        const providerStep = traceSteps.find((s) => {{
-          const n = String((s || {{}}).name || "");
-          return !!n && !n.startsWith("Zscaler");
+        // Row count is known up front: one per trace step, plus the spawn and tool rows.
+        const timeline = new Array(traceSteps.length + spawnTimeline.length + toolTimeline.length);
+        let ti = 0;
+        let tokenInTotal = 0;
+        let tokenOutTotal = 0;
+        let providerLatencyMs = 0;
+        let guardrailsChecks = 0;
+        let guardrailsBlocks = 0;
+        // The first named non-Zscaler step is the provider call; found in the same pass.
+        let providerStep = null;
+        traceSteps.forEach((step, idx) => {{
+          const rawName = String(step?.name || "");
+          if (!providerStep && rawName && !rawName.startsWith("Zscaler")) providerStep = step;
+          const name = rawName || `Step ${{idx + 1}}`;
+          const status = step?.response?.status ?? "";
+          const action = step?.response?.body?.action || "";
+          const host = _hostFromUrl(step?.request?.url || "");
+          const respBody = step?.response?.body && typeof step.response.body === "object" ? step.response.body : {{}};
+          const usage = _extractUsageTokens(respBody);
+          tokenInTotal += usage.in;
+          tokenOutTotal += usage.out;
+          if (name.startsWith("Zscaler AI Guard")) {{
+            guardrailsChecks += 1;
+            if (String(action).toUpperCase() === "BLOCK") guardrailsBlocks += 1;
+          }} else {{
+            providerLatencyMs += _extractLatencyMs(respBody);
+          }}
+          timeline[ti++] = {{
+            title: `${{idx + 1}}. ${{name}}`,
+            meta: [
+              status !== "" ? `status=${{status}}` : "",
+              action ? `action=${{action}}` : "",
+              usage.in || usage.out ? `tokens=${{usage.in}}/${{usage.out}}` : "",
+              host ? `host=${{host}}` : "",
+            ].filter(Boolean).join(" | ") || "No additional metadata",
+          }};
         }});
         const providerId = String(entry?.provider || "ollama");
         const providerLabel = _providerLabel(providerId);
@@ -9843,15 +10691,11 @@ HTML = f"""<!doctype html>
         const inferPromptBlocked = responseText.includes("prompt was blocked");
         const inferResponseBlocked = responseText.includes("response was blocked");
         const blockedStage = stage || (inferPromptBlocked ? "IN" : (inferResponseBlocked ? "OUT" : ""));
-        const toolEvents = agentTrace.filter((i) => i && i.kind === "tool");
-        const snapshotEvent = agentTrace.find((i) => i && i.event === "toolset.snapshot" && i.stage === "chat_start")
-          || agentTrace.find((i) => i && i.event === "toolset.snapshot");
+        const snapshotEvent = chatStartSnapshot || firstSnapshot;
         const availableToolCount = Number((snapshotEvent?.counts || {{}}).tools || 0);
         const serverCount = Number((snapshotEvent?.counts || {{}}).servers || 0);
         const providerReached = !!providerStep;
-        const networkTools = toolEvents.filter((i) => String(i?.tool_trace?.request?.url || "").trim().length > 0);
-        const localTools = toolEvents.length - networkTools.length;
-        const toolErrors = toolEvents.filter(_isLikelyToolError).length;
+        const localTools = toolCount - networkToolCount;
         const modeText = !guardrailsEnabled ? "Off" : (proxyMode ? "Proxy" : "API/DAS");
         const upstreamUrl = providerStep?.request?.url || _providerUpstreamEndpoint(providerId) || "";
         const topologyRaw = String(entry?.executionTopology || "single_process");
@@ -9895,10 +10739,10 @@ HTML = f"""<!doctype html>
           }}
         }}
 
-        if (!toolEvents.length) {{
+        if (!toolCount) {{
           summary.push("No tool calls were invoked in this run.");
         }} else {{
-          summary.push(`Tools invoked: ${{toolEvents.length}} total (${{localTools}} local, ${{networkTools.length}} network-bound), ${{toolErrors}} error(s).`);
+          summary.push(`Tools invoked: ${{toolCount}} total (${{localTools}} local, ${{networkToolCount}} network-bound), ${{toolErrors}} error(s).`);
         }}
 
         const blockedText = blocked
@@ -9919,64 +10763,14 @@ HTML = f"""<!doctype html>
           {{ k: "Tool-Allowed Specialists", v: spawnedAgents.filter((a) => a.tools).map((a) => a.label).join(", ") || "None" }},
           {{ k: "MCP Servers", v: serverCount ? String(serverCount) : "Unknown" }},
           {{ k: "Available Tools", v: availableToolCount ? String(availableToolCount) : "Unknown" }},
-          {{ k: "Invoked Tools", v: String(toolEvents.length) }},
-          {{ k: "Network Tool Calls", v: String(networkTools.length) }},
+          {{ k: "Invoked Tools", v: String(toolCount) }},
+          {{ k: "Network Tool Calls", v: String(networkToolCount) }},
           {{ k: "Local Tool Calls", v: String(Math.max(0, localTools)) }},
           {{ k: "Tool Errors", v: String(toolErrors) }},
         ];
 
-        const timeline = [];
-        let tokenInTotal = 0;
-        let tokenOutTotal = 0;
-        let providerLatencyMs = 0;
-        let guardrailsChecks = 0;
-        let guardrailsBlocks = 0;
-        traceSteps.forEach((step, idx) => {{
-          const name = String(step?.name || `Step ${{idx + 1}}`);
-          const status = step?.response?.status ?? "";
-          const action = step?.response?.body?.action || "";
-          const host = _hostFromUrl(step?.request?.url || "");
-          const respBody = step?.response?.body && typeof step.response.body === "object" ? step.response.body : {{}};
-          const usage = _extractUsageTokens(respBody);
-          tokenInTotal += usage.in;
-          tokenOutTotal += usage.out;
-          if (name.startsWith("Zscaler AI Guard")) {{
-            guardrailsChecks += 1;
-            if (String(action).toUpperCase() === "BLOCK") guardrailsBlocks += 1;
-          }} else {{
-            providerLatencyMs += _extractLatencyMs(respBody);
-          }}
-          timeline.push({{
-            title: `${{idx + 1}}. ${{name}}`,
-            meta: [
-              status !== "" ? `status=${{status}}` : "",
-              action ? `action=${{action}}` : "",
-              usage.in || usage.out ? `tokens=${{usage.in}}/${{usage.out}}` : "",
-              host ? `host=${{host}}` : "",
-            ].filter(Boolean).join(" | ") || "No additional metadata",
-          }});
-        }});
-        spawnEvents.forEach((agentItem, idx) => {{
-          timeline.push({{
-            title: `Agent ${{idx + 1}}. Spawn ${{String(agentItem?.label || agentItem?.to_agent || "Specialist")}}`,
-            meta: [
-              agentItem?.task ? `task=${{String(agentItem.task)}}` : "",
-              agentItem?.tools_enabled_for_agent || agentItem?.tools_allowed ? "tools=allowed" : "tools=not requested",
-            ].filter(Boolean).join(" | ") || "specialist selected by orchestrator",
-          }});
-        }});
-        toolEvents.forEach((toolItem, idx) => {{
-          const tName = String(toolItem?.tool || `tool_${{idx + 1}}`);
-          const tHost = _hostFromUrl(toolItem?.tool_trace?.request?.url || "");
-          const tErr = _isLikelyToolError(toolItem) ? "error" : "ok";
-          timeline.push({{
-            title: `Tool ${{idx + 1}}. ${{tName}}`,
-            meta: [
-              `result=${{tErr}}`,
-              tHost ? `dest=${{tHost}}` : "dest=local",
-            ].join(" | "),
-          }});
-        }});
+        for (const row of spawnTimeline) timeline[ti++] = row;
+        for (const row of toolTimeline) timeline[ti++] = row;
 
         const performance = [
           {{ k: "Trace Steps", v: String(traceSteps.length) }},
@@ -9990,6 +10784,11 @@ HTML = f"""<!doctype html>
         return {{ summary, security, tools, performance, timeline, roles: roleSummaries }};
       }}
 
+      // Escaped explainer markup per trace entry; the explainer re-renders on every trace view
+      // refresh while open, so an unchanged entry skips both the build and the innerHTML write.
+      const flowExplainHtmlCache = new WeakMap();
+      let flowExplainRenderedEntry = null;
+
       function renderFlowExplain(entry) {{
         if (!entry) {{
           flowExplainBodyEl.innerHTML = `
@@ -9998,10 +10797,29 @@ HTML = f"""<!doctype html>
               <div class="explain-card-body">Send a prompt first, then open Explain Flow.</div>
             </div>
           `;
+          flowExplainRenderedEntry = null;
           return;
         }}
-        const data = _buildFlowExplainData(entry);
-        flowExplainBodyEl.innerHTML = `
+        if (entry === flowExplainRenderedEntry) return;
+        let html = flowExplainHtmlCache.get(entry);
+        if (html === undefined) {{
+          html = _flowExplainHtml(_buildFlowExplainData(entry));
+          flowExplainHtmlCache.set(entry, html);
+        }}
+        flowExplainBodyEl.innerHTML = html;
+        flowExplainRenderedEntry = entry;
+      }}
+
+      function _explainKvHtml(items) {{
+        const parts = [];
+        for (const i of items) {{
+          parts.push('<div class="explain-kv"><div class="k">', escapeHtml(i.k), '</div><div class="v">', escapeHtml(i.v), "</div></div>");
+        }}
+        return parts.join("");
+      }}
+
+      function _flowExplainHtml(data) {{
+        return `
           <div class="explain-card">
             <div class="explain-card-head">What Happened</div>
             <div class="explain-card-body">
@@ -10014,19 +10832,19 @@ HTML = f"""<!doctype html>
             <div class="explain-card">
               <div class="explain-card-head">Security Outcome</div>
               <div class="explain-card-body explain-grid">
-                ${{data.security.map((i) => `<div class="explain-kv"><div class="k">${{escapeHtml(i.k)}}</div><div class="v">${{escapeHtml(i.v)}}</div></div>`).join("")}}
+                ${{_explainKvHtml(data.security)}}
               </div>
             </div>
             <div class="explain-card">
               <div class="explain-card-head">Tool Activity</div>
               <div class="explain-card-body explain-grid">
-                ${{data.tools.map((i) => `<div class="explain-kv"><div class="k">${{escapeHtml(i.k)}}</div><div class="v">${{escapeHtml(i.v)}}</div></div>`).join("")}}
+                ${{_explainKvHtml(data.tools)}}
               </div>
             </div>
             <div class="explain-card">
               <div class="explain-card-head">Performance & Cost Signals</div>
               <div class="explain-card-body explain-grid">
-                ${{data.performance.map((i) => `<div class="explain-kv"><div class="k">${{escapeHtml(i.k)}}</div><div class="v">${{escapeHtml(i.v)}}</div></div>`).join("")}}
+                ${{_explainKvHtml(data.performance)}}
               </div>
             </div>
           </div>
@@ -10061,11 +10879,13 @@ HTML = f"""<!doctype html>
 
       function openFlowExplainModal() {{
         renderFlowExplain(latestTraceEntry);
+        flowExplainOpen = true;
         flowExplainModalEl.classList.add("open");
         flowExplainModalEl.setAttribute("aria-hidden", "false");
       }}
 
       function closeFlowExplainModal() {{
+        flowExplainOpen = false;
         flowExplainModalEl.classList.remove("open");
         flowExplainModalEl.setAttribute("aria-hidden", "true");
       }}
@@ -10248,6 +11068,17 @@ HTML = f"""<!doctype html>
         closeDemoWizardModal();
       }}
 
+      // Shows a transient status message that falls back to "Idle" unless something else has
+      // replaced it; repeated calls reuse one timer instead of stacking them.
+      function _flashStatus(message, resetAfterMs = 1200) {{
+        statusEl.textContent = message;
+        if (statusClearTimer) clearTimeout(statusClearTimer);
+        statusClearTimer = setTimeout(() => {{
+          statusClearTimer = 0;
+          if (statusEl.textContent === message) statusEl.textContent = "Idle";
+        }}, resetAfterMs);
+      }}
+
       function exportFlowEvidence() {{
         const entry = getSelectedTraceEntry();
         if (!entry) {{
@@ -10256,6 +11087,8 @@ HTML = f"""<!doctype html>
         }}
         const explain = _buildFlowExplainData(entry);
         const graph = makeFlowGraph(entry);
+        // Lazily built node metadata has to be materialized before it can be serialized.
+        (graph.nodes || []).forEach(_flowNodeMeta);
         const payload = {{
           exported_at: new Date().toISOString(),
           app: "ai-runtime-security-demo",
@@ -10270,7 +11103,7 @@ HTML = f"""<!doctype html>
             edges: graph.edges || [],
           }},
         }};
-        const blob = new Blob([JSON.stringify(payload, null, 2)], {{ type: "application/json" }});
+        const blob = new Blob([JSON.stringify(payload)], {{ type: "application/json" }});
         const url = URL.createObjectURL(blob);
         const a = document.createElement("a");
         const stamp = new Date().toISOString().replaceAll(":", "-").replaceAll(".", "-");
@@ -10279,21 +11112,13 @@ HTML = f"""<!doctype html>
         document.body.appendChild(a);
         a.click();
         a.remove();
-        URL.revokeObjectURL(url);
-        statusEl.textContent = "Evidence exported";
-        setTimeout(() => {{
-          if (statusEl.textContent === "Evidence exported") statusEl.textContent = "Idle";
-        }}, 1200);
+        // Revoking in the same task can cancel the download in some browsers.
+        setTimeout(() => URL.revokeObjectURL(url), 0);
+        _flashStatus("Evidence exported");
       }}
 
       function _simpleTextFingerprint(text) {{
-        const s = String(text || "");
-        let h = 2166136261;
-        for (let i = 0; i < s.length; i += 1) {{
-          h ^= s.charCodeAt(i);
-          h = Math.imul(h, 16777619);
-        }}
-        return (h >>> 0).toString(16).padStart(8, "0");
+        return _hash32(String(text || "")).toString(16).padStart(8, "0");
       }}
 
       function openPolicyReplayModal() {{
@@ -10641,6 +11466,8 @@ HTML = f"""<!doctype html>
         }}
       }}
 
+      const DETERMINISM_LAB_CONCURRENCY = 4;
+
       async function runDeterminismLab() {{
         const runs = Math.max(2, Math.min(10, Number(determinismRunsInputEl.value || 3) || 3));
         const delayMs = Math.max(0, Math.min(5000, Number(determinismDelayInputEl.value || 250) || 0));
@@ -10650,10 +11477,17 @@ HTML = f"""<!doctype html>
           return;
         }}
         determinismRunBtnEl.disabled = true;
-        const rows = [];
+        // Runs overlap (up to DETERMINISM_LAB_CONCURRENCY in flight); run i starts no earlier than
+        // i * delayMs after the lab starts. Rows are stored by run index so the output stays ordered.
+        const rows = new Array(runs).fill(null);
         const buckets = new Map();
+        const labStartedAt = Date.now();
+        let nextRun = 0;
+        let doneCount = 0;
         determinismOutputEl.textContent = `Running determinism lab (${{runs}} runs)...`;
-        for (let i = 0; i < runs; i += 1) {{
+        const runOne = async (i) => {{
+          const waitMs = labStartedAt + (i * delayMs) - Date.now();
+          if (waitMs > 0) await new Promise((resolve) => setTimeout(resolve, waitMs));
           try {{
             const startedAt = Date.now();
             const res = await fetch("/chat", {{
@@ -10697,7 +11531,7 @@ HTML = f"""<!doctype html>
               tool_calls: toolCalls,
               preview: _short(responseText, 120),
             }};
-            rows.push(row);
+            rows[i] = row;
             buckets.set(fp, (buckets.get(fp) || 0) + 1);
             addTrace({{
               prompt: base.prompt,
@@ -10721,7 +11555,7 @@ HTML = f"""<!doctype html>
               body: data,
             }});
           }} catch (err) {{
-            rows.push({{
+            rows[i] = {{
               run: i + 1,
               status: "error",
               blocked: false,
@@ -10729,16 +11563,22 @@ HTML = f"""<!doctype html>
               fingerprint: "n/a",
               tool_calls: 0,
               preview: `Request failed: ${{err?.message || err}}`,
-            }});
+            }};
           }}
+          doneCount += 1;
           determinismOutputEl.textContent = pretty({{
-            progress: `${{i + 1}}/${{runs}}`,
-            rows,
+            progress: `${{doneCount}}/${{runs}}`,
+            rows: rows.filter(Boolean),
           }});
-          if (i < runs - 1 && delayMs > 0) {{
-            await new Promise((resolve) => setTimeout(resolve, delayMs));
+        }};
+        const worker = async () => {{
+          while (nextRun < runs) {{
+            const i = nextRun;
+            nextRun += 1;
+            await runOne(i);
           }}
-        }}
+        }};
+        await Promise.all(Array.from({{ length: Math.min(DETERMINISM_LAB_CONCURRENCY, runs) }}, worker));
         determinismOutputEl.textContent = pretty({{
           runs,
           unique_fingerprints: buckets.size,
@@ -10759,130 +11599,190 @@ HTML = f"""<!doctype html>
         scenarioRunnerModalEl.setAttribute("aria-hidden", "true");
       }}
 
+      const SCENARIO_KNOWN_PROVIDERS = new Set(["ollama", "anthropic", "openai", "bedrock_invoke", "gemini", "vertex", "perplexity", "xai", "kong", "litellm", "azure_foundry"]);
+
       function _parseScenarioProviders(raw) {{
-        const known = new Set(["ollama", "anthropic", "openai", "bedrock_invoke", "gemini", "vertex", "perplexity", "xai", "kong", "litellm", "azure_foundry"]);
-        const vals = String(raw || "")
-          .split(",")
-          .map((s) => s.trim().toLowerCase())
-          .filter(Boolean)
-          .filter((v, i, arr) => arr.indexOf(v) === i)
-          .filter((v) => known.has(v));
+        const vals = [];
+        const seen = new Set();
+        for (const part of String(raw || "").split(",")) {{
+          const v = part.trim().toLowerCase();
+          if (!v || seen.has(v) || !SCENARIO_KNOWN_PROVIDERS.has(v)) continue;
+          seen.add(v);
+          vals.push(v);
+        }}
         return vals.length ? vals : [String(providerSelectEl.value || "ollama").toLowerCase()];
       }}
 
+      const SCENARIO_RUNNER_CONCURRENCY = 6;
+      // Outcomes of successful scenario calls, keyed by the request settings (LRU, page lifetime).
+      const SCENARIO_RESPONSE_CACHE_MAX = 256;
+      const scenarioResponseCache = new Map();
+
       async function runScenarioRunner() {{
         const providers = _parseScenarioProviders(scenarioProvidersInputEl.value);
         const scenarioLimit = Math.max(1, Math.min(20, Number(scenarioLimitInputEl.value || 8) || 8));
         const scenarios = SCENARIO_SUITE.slice(0, scenarioLimit);
         scenarioRunnerRunBtnEl.disabled = true;
         scenarioRunnerOutputEl.textContent = `Running ${{scenarios.length}} scenarios across ${{providers.length}} provider(s)...`;
-        const rows = [];
+        // Provider x scenario pairs run through a small worker pool; rows keep grid order.
+        const tasks = providers.flatMap((provider) => scenarios.map((scenario) => ({{ provider, scenario }})));
+        const rows = new Array(tasks.length).fill(null);
+        // Per-provider stats are tallied as each row lands; the summary is derived from them at the end.
         const perProvider = {{}};
         for (const provider of providers) {{
-          for (const scenario of scenarios) {{
-            const started = Date.now();
-            const scenarioConversationId = `scenario-${{Date.now()}}-${{Math.random().toString(16).slice(2)}}`;
-            try {{
-              const res = await fetch("/chat", {{
-                method: "POST",
-                headers: {{
-                  "Content-Type": "application/json",
-                  ...(currentDemoUser() ? {{ "X-Demo-User": currentDemoUser() }} : {{}}),
-                }},
-                body: JSON.stringify({{
-                  prompt: scenario.prompt,
-                  provider,
-                  chat_mode: "single",
-                  conversation_id: scenarioConversationId,
-                  guardrails_enabled: guardrailsToggleEl.checked,
-                  zscaler_proxy_mode: zscalerProxyModeToggleEl.checked,
-                  zscaler_das_mode: currentZscalerDasMode(),
-                  zscaler_policy_id: String(zscalerPolicyIdInputEl?.value || ""),
-                  agentic_enabled: false,
-                  tools_enabled: false,
-                  local_tasks_enabled: false,
-                  multi_agent_enabled: false,
-                  tool_permission_profile: "standard",
-                  execution_topology: currentExecutionTopology(),
-                }}),
-              }});
-              const data = await res.json();
-              const blocked = !!(data?.guardrails && data.guardrails.blocked);
-              const stage = String(data?.guardrails?.stage || "");
-              const responseText = String(data?.response || data?.error || "");
-              rows.push({{
-                provider,
-                scenario: scenario.key,
-                status: res.status,
-                blocked,
-                stage,
-                latency_ms: Math.max(0, Date.now() - started),
-                fingerprint: _simpleTextFingerprint(responseText),
-              }});
-              addTrace({{
-                prompt: scenario.prompt,
-                provider,
-                demoUser: currentDemoUser() || "",
-                chatMode: "single",
-                messages: undefined,
-                conversationId: scenarioConversationId,
-                guardrailsEnabled: guardrailsToggleEl.checked,
-                zscalerProxyMode: zscalerProxyModeToggleEl.checked,
-                agenticEnabled: false,
-                toolsEnabled: false,
-                localTasksEnabled: false,
-                multiAgentEnabled: false,
-                toolPermissionProfile: "standard",
-                executionTopology: currentExecutionTopology(),
-                clientLatencyMs: Math.max(0, Date.now() - started),
-                status: res.status,
-                body: data,
-              }});
-            }} catch (err) {{
-              rows.push({{
-                provider,
-                scenario: scenario.key,
-                status: "error",
-                blocked: false,
-                stage: "",
-                latency_ms: Math.max(0, Date.now() - started),
-                error: String(err?.message || err),
-              }});
-            }}
+          perProvider[provider] = {{ total: 0, blocked: 0, errors: 0, latency_sum: 0, latency_count: 0 }};
+        }}
+        let nextTask = 0;
+        let doneCount = 0;
+        let cacheHits = 0;
+        let cacheMisses = 0;
+        const scenarioKeys = scenarios.map((s) => s.key);
+        // Completions can arrive in bursts; the progress view is redrawn at most once per frame.
+        let progressRaf = 0;
+        const recordRow = (row) => {{
+          const stats = perProvider[row.provider];
+          stats.total += 1;
+          stats.blocked += row.blocked ? 1 : 0;
+          stats.errors += (row.status === "error" || Number(row.status) >= 500) ? 1 : 0;
+          // Cached rows made no request, so they are left out of the latency average.
+          if (!row.cached) {{
+            stats.latency_sum += Number(row.latency_ms || 0);
+            stats.latency_count += 1;
+          }}
+          doneCount += 1;
+          if (progressRaf) return;
+          progressRaf = requestAnimationFrame(() => {{
+            progressRaf = 0;
             scenarioRunnerOutputEl.textContent = pretty({{
-              progress: `${{rows.length}}/${{providers.length * scenarios.length}}`,
+              progress: `${{doneCount}}/${{tasks.length}}`,
               providers,
-              scenarios: scenarios.map((s) => s.key),
+              scenarios: scenarioKeys,
             }});
+          }});
+        }};
+        const runOne = async (idx) => {{
+          const {{ provider, scenario }} = tasks[idx];
+          const started = Date.now();
+          const scenarioConversationId = `scenario-${{Date.now()}}-${{Math.random().toString(16).slice(2)}}`;
+          const demoUser = currentDemoUser();
+          const settings = {{
+            prompt: scenario.prompt,
+            provider,
+            chat_mode: "single",
+            guardrails_enabled: guardrailsToggleEl.checked,
+            zscaler_proxy_mode: zscalerProxyModeToggleEl.checked,
+            zscaler_das_mode: currentZscalerDasMode(),
+            zscaler_policy_id: String(zscalerPolicyIdInputEl?.value || ""),
+            agentic_enabled: false,
+            tools_enabled: false,
+            local_tasks_enabled: false,
+            multi_agent_enabled: false,
+            tool_permission_profile: "standard",
+            execution_topology: currentExecutionTopology(),
+          }};
+          const cacheKey = JSON.stringify([demoUser || "", settings]);
+          const cached = scenarioResponseCache.get(cacheKey);
+          if (cached) {{
+            scenarioResponseCache.delete(cacheKey);
+            scenarioResponseCache.set(cacheKey, cached);
+            cacheHits += 1;
+            rows[idx] = {{ provider, scenario: scenario.key, ...cached, latency_ms: 0, cached: true }};
+            recordRow(rows[idx]);
+            return;
           }}
-        }}
-        for (const row of rows) {{
-          const p = row.provider;
-          if (!perProvider[p]) {{
-            perProvider[p] = {{ total: 0, blocked: 0, errors: 0, latency_sum: 0 }};
+          cacheMisses += 1;
+          try {{
+            const res = await fetch("/chat", {{
+              method: "POST",
+              headers: {{
+                "Content-Type": "application/json",
+                ...(demoUser ? {{ "X-Demo-User": demoUser }} : {{}}),
+              }},
+              body: JSON.stringify({{ ...settings, conversation_id: scenarioConversationId }}),
+            }});
+            const data = await res.json();
+            const blocked = !!(data?.guardrails && data.guardrails.blocked);
+            const stage = String(data?.guardrails?.stage || "");
+            const responseText = String(data?.response || data?.error || "");
+            const outcome = {{
+              status: res.status,
+              blocked,
+              stage,
+              fingerprint: _simpleTextFingerprint(responseText),
+            }};
+            rows[idx] = {{
+              provider,
+              scenario: scenario.key,
+              ...outcome,
+              latency_ms: Math.max(0, Date.now() - started),
+            }};
+            if (res.ok && !data?.error) {{
+              if (scenarioResponseCache.size >= SCENARIO_RESPONSE_CACHE_MAX) {{
+                scenarioResponseCache.delete(scenarioResponseCache.keys().next().value);
+              }}
+              scenarioResponseCache.set(cacheKey, outcome);
+            }}
+            addTrace({{
+              prompt: scenario.prompt,
+              provider,
+              demoUser: currentDemoUser() || "",
+              chatMode: "single",
+              messages: undefined,
+              conversationId: scenarioConversationId,
+              guardrailsEnabled: guardrailsToggleEl.checked,
+              zscalerProxyMode: zscalerProxyModeToggleEl.checked,
+              agenticEnabled: false,
+              toolsEnabled: false,
+              localTasksEnabled: false,
+              multiAgentEnabled: false,
+              toolPermissionProfile: "standard",
+              executionTopology: currentExecutionTopology(),
+              clientLatencyMs: Math.max(0, Date.now() - started),
+              status: res.status,
+              body: data,
+            }});
+          }} catch (err) {{
+            rows[idx] = {{
+              provider,
+              scenario: scenario.key,
+              status: "error",
+              blocked: false,
+              stage: "",
+              latency_ms: Math.max(0, Date.now() - started),
+              error: String(err?.message || err),
+            }};
           }}
-          perProvider[p].total += 1;
-          perProvider[p].blocked += row.blocked ? 1 : 0;
-          perProvider[p].errors += (row.status === "error" || Number(row.status) >= 500) ? 1 : 0;
-          perProvider[p].latency_sum += Number(row.latency_ms || 0);
-        }}
-        const summary = Object.fromEntries(
-          Object.entries(perProvider).map(([provider, stats]) => [provider, {{
+          recordRow(rows[idx]);
+        }};
+        const worker = async () => {{
+          while (nextTask < tasks.length) {{
+            const idx = nextTask;
+            nextTask += 1;
+            await runOne(idx);
+          }}
+        }};
+        await Promise.all(Array.from({{ length: Math.min(SCENARIO_RUNNER_CONCURRENCY, tasks.length) }}, worker));
+        if (progressRaf) cancelAnimationFrame(progressRaf);
+        const summary = {{}};
+        for (const provider of providers) {{
+          const stats = perProvider[provider];
+          summary[provider] = {{
             total: stats.total,
             blocked: stats.blocked,
             blocked_rate: stats.total ? Number((stats.blocked / stats.total).toFixed(3)) : 0,
             errors: stats.errors,
-            avg_latency_ms: stats.total ? Math.round(stats.latency_sum / stats.total) : 0,
-          }}])
-        );
+            avg_latency_ms: stats.latency_count ? Math.round(stats.latency_sum / stats.latency_count) : 0,
+          }};
+        }}
         lastScenarioRunnerReport = {{
           generated_at: new Date().toISOString(),
           providers,
-          scenarios: scenarios.map((s) => s.key),
+          scenarios: scenarioKeys,
           summary,
+          cache: {{ hits: cacheHits, misses: cacheMisses }},
           rows,
         }};
-        scenarioRunnerOutputEl.textContent = pretty(lastScenarioRunnerReport);
+        scenarioRunnerOutputEl.textContent = prettyCached(lastScenarioRunnerReport);
         scenarioRunnerRunBtnEl.disabled = false;
       }}
 
@@ -10905,7 +11805,16 @@ HTML = f"""<!doctype html>
           usageTimelineBarsEl.innerHTML = `<div class="hint">No timeline data for this range.</div>`;
           return;
         }}
-        const labels = Array.from(new Set(series.flatMap((s) => (Array.isArray(s.points) ? s.points.map((p) => String(p.t || "")) : [])))).sort();
+        const labelSet = new Set();
+        for (const s of series) {{
+          const pts = s.points;
+          if (!Array.isArray(pts)) continue;
+          for (let i = 0; i < pts.length; i += 1) {{
+            const t = pts[i]?.t;
+            if (t) labelSet.add(typeof t === "string" ? t : String(t));
+          }}
+        }}
+        const labels = Array.from(labelSet).sort();
         if (!labels.length) {{
           usageTimelineBarsEl.innerHTML = `<div class="hint">No timeline data for this range.</div>`;
           return;
@@ -10916,15 +11825,26 @@ HTML = f"""<!doctype html>
         const margin = {{ top: 18, right: 20, bottom: 46, left: 40 }};
         const innerW = Math.max(10, width - margin.left - margin.right);
         const innerH = Math.max(10, height - margin.top - margin.bottom);
-        const maxY = Math.max(1, ...series.flatMap((s) => (s.points || []).map((p) => Number(p.requests || 0))));
-        const xForIdx = (idx) => margin.left + (labels.length <= 1 ? innerW / 2 : (idx * innerW / (labels.length - 1)));
-        const yForVal = (val) => margin.top + innerH - ((Math.max(0, Number(val || 0)) / maxY) * innerH);
+        let maxY = 1;
+        for (const s of series) {{
+          for (const p of (s.points || [])) maxY = Math.max(maxY, Number(p.requests || 0) || 0);
+        }}
+        // x depends only on the label index, so it is computed once and shared by every series.
+        const xs = new Float64Array(labels.length);
+        for (let idx = 0; idx < labels.length; idx += 1) {{
+          xs[idx] = margin.left + (labels.length <= 1 ? innerW / 2 : (idx * innerW / (labels.length - 1)));
+        }}
+        const yBase = margin.top + innerH;
+        const yScale = innerH / maxY;
+        const yForVal = (val) => yBase - (Math.max(0, Number(val || 0)) * yScale);
         const dataByProvider = series.map((s, i) => {{
-          const map = new Map((s.points || []).map((p) => [String(p.t || ""), Number(p.requests || 0)]));
-          const pts = labels.map((lab, idx) => {{
-            const v = map.get(lab) || 0;
-            return {{ x: xForIdx(idx), y: yForVal(v), v }};
-          }});
+          const map = new Map();
+          for (const p of (s.points || [])) map.set(String(p.t || ""), Number(p.requests || 0));
+          const pts = new Array(labels.length);
+          for (let idx = 0; idx < labels.length; idx += 1) {{
+            const v = map.get(labels[idx]) || 0;
+            pts[idx] = {{ x: xs[idx], y: yBase - (Math.max(0, v) * yScale), v }};
+          }}
           return {{
             provider: String(s.provider || "unknown"),
             color: colorPalette[i % colorPalette.length],
@@ -10934,37 +11854,87 @@ HTML = f"""<!doctype html>
         const yTicks = [0, 0.25, 0.5, 0.75, 1].map((r) => Math.round(maxY * r));
         const uniqueTicks = Array.from(new Set(yTicks)).sort((a, b) => a - b);
         const labelSampleStep = labels.length > 10 ? Math.ceil(labels.length / 10) : 1;
-        const xLabels = labels.map((lab, idx) => ({{
-          show: idx % labelSampleStep === 0 || idx === labels.length - 1,
-          text: bucket === "hour" ? String(lab).slice(11, 16) : String(lab).slice(5),
-          x: xForIdx(idx),
-        }}));
-        const pathFor = (pts) => pts.map((p, idx) => `${{idx === 0 ? "M" : "L"}}${{p.x.toFixed(1)}} ${{p.y.toFixed(1)}}`).join(" ");
+        const xLabelText = (lab) => (bucket === "hour" ? String(lab).slice(11, 16) : String(lab).slice(5));
         const legend = dataByProvider.map((s) => `
           <span class="usage-legend-item">
             <span class="usage-legend-swatch" style="background:${{s.color}};"></span>
             <span>${{escapeHtml(s.provider)}}</span>
           </span>
         `).join("");
-        const svg = `
-          <svg viewBox="0 0 ${{width}} ${{height}}" width="100%" height="${{height}}" role="img" aria-label="Usage over time line chart">
-            <rect x="0" y="0" width="${{width}}" height="${{height}}" fill="transparent"></rect>
-            ${{uniqueTicks.map((t) => {{
-              const y = yForVal(t);
-              return `<line x1="${{margin.left}}" y1="${{y}}" x2="${{width - margin.right}}" y2="${{y}}" stroke="rgba(148,163,184,0.22)" stroke-width="1"></line>
-                <text x="${{margin.left - 8}}" y="${{y + 4}}" text-anchor="end" font-size="11" fill="var(--muted)">${{t}}</text>`;
-            }}).join("")}}
-            ${{xLabels.filter((x) => x.show).map((x) => `<text x="${{x.x}}" y="${{height - 22}}" text-anchor="middle" font-size="11" fill="var(--muted)">${{escapeHtml(x.text)}}</text>`).join("")}}
-            <text x="${{margin.left + (innerW / 2)}}" y="${{height - 6}}" text-anchor="middle" font-size="11" fill="var(--muted)">Time</text>
-            <text x="14" y="${{margin.top + (innerH / 2)}}" text-anchor="middle" font-size="11" fill="var(--muted)" transform="rotate(-90 14 ${{margin.top + (innerH / 2)}})">Requests</text>
-            ${{dataByProvider.map((s) => `<path d="${{pathFor(s.pts)}}" fill="none" stroke="${{s.color}}" stroke-width="2.2"></path>`).join("")}}
-            ${{dataByProvider.map((s) => s.pts.map((p) => `<circle cx="${{p.x}}" cy="${{p.y}}" r="2.5" fill="${{s.color}}"><title>${{escapeHtml(s.provider)}}: ${{p.v}}</title></circle>`).join("")).join("")}}
-          </svg>
-        `;
-        usageTimelineBarsEl.innerHTML = `
-          <div class="usage-chart-legend"><strong style="font-size:12px;color:var(--ink);">Legend:</strong>${{legend}}</div>
-          <div class="usage-chart-wrap">${{svg}}</div>
-        `;
+        // The chart is built as SVG nodes (no markup parsing); coordinates are rounded to 0.1px.
+        const fmt = (n) => n.toFixed(1);
+        const mutedText = (x, y, anchor, text) => {{
+          const el = _svgAttrs("text", {{ x, y, "text-anchor": anchor, "font-size": "11", fill: "var(--muted)" }});
+          el.textContent = String(text);
+          return el;
+        }};
+        const svg = _svgAttrs("svg", {{
+          viewBox: `0 0 ${{width}} ${{height}}`,
+          width: "100%",
+          height,
+          role: "img",
+          "aria-label": "Usage over time line chart",
+        }});
+        const frag = document.createDocumentFragment();
+        frag.append(_svgAttrs("rect", {{ x: 0, y: 0, width, height, fill: "transparent" }}));
+        const gridX2 = width - margin.right;
+        for (const t of uniqueTicks) {{
+          const y = yForVal(t);
+          frag.append(
+            _svgAttrs("line", {{ x1: margin.left, y1: fmt(y), x2: gridX2, y2: fmt(y), stroke: "rgba(148,163,184,0.22)", "stroke-width": "1" }}),
+            mutedText(margin.left - 8, fmt(y + 4), "end", t),
+          );
+        }}
+        // Every labelSampleStep-th label is drawn, plus the last one if the stride skips it.
+        const lastIdx = labels.length - 1;
+        for (let idx = 0; idx <= lastIdx; idx += labelSampleStep) {{
+          frag.append(mutedText(fmt(xs[idx]), height - 22, "middle", xLabelText(labels[idx])));
+        }}
+        if (lastIdx % labelSampleStep !== 0) {{
+          frag.append(mutedText(fmt(xs[lastIdx]), height - 22, "middle", xLabelText(labels[lastIdx])));
+        }}
+        const midY = margin.top + (innerH / 2);
+        const yAxisLabel = mutedText(14, midY, "middle", "Requests");
+        yAxisLabel.setAttribute("transform", `rotate(-90 14 ${{midY}})`);
+        frag.append(mutedText(margin.left + (innerW / 2), height - 6, "middle", "Time"), yAxisLabel);
+        for (const s of dataByProvider) {{
+          const d = [];
+          s.pts.forEach((p, idx) => d.push(`${{idx === 0 ? "M" : "L"}}${{fmt(p.x)}} ${{fmt(p.y)}}`));
+          frag.append(_svgAttrs("path", {{ d: d.join(" "), fill: "none", stroke: s.color, "stroke-width": "2.2" }}));
+        }}
+        for (const s of dataByProvider) {{
+          for (const p of s.pts) {{
+            const circle = _svgAttrs("circle", {{ cx: fmt(p.x), cy: fmt(p.y), r: "2.5", fill: s.color }});
+            const title = _svgEl("title");
+            title.textContent = `${{s.provider}}: ${{p.v}}`;
+            circle.append(title);
+            frag.append(circle);
+          }}
+        }}
+        svg.append(frag);
+        const legendEl = document.createElement("div");
+        legendEl.className = "usage-chart-legend";
+        legendEl.innerHTML = `<strong style="font-size:12px;color:var(--ink);">Legend:</strong>${{legend}}`;
+        const wrapEl = document.createElement("div");
+        wrapEl.className = "usage-chart-wrap";
+        wrapEl.append(svg);
+        usageTimelineBarsEl.replaceChildren(legendEl, wrapEl);
+      }}
+
+      // Table rows are built as DOM nodes with textContent cells, so no markup is parsed or escaped.
+      function _usageTableRows(rows, cellsFor, lastCellClass = "") {{
+        const frag = document.createDocumentFragment();
+        for (const row of rows) {{
+          const tr = document.createElement("tr");
+          for (const text of cellsFor(row)) {{
+            const td = document.createElement("td");
+            td.textContent = text;
+            tr.append(td);
+          }}
+          if (lastCellClass && tr.lastElementChild) tr.lastElementChild.className = lastCellClass;
+          frag.append(tr);
+        }}
+        return frag;
       }}
 
       function _renderUsageDashboard(data) {{
@@ -10978,45 +11948,54 @@ HTML = f"""<!doctype html>
           usageScopeLabelEl.textContent = `(${{String(data?.scope_label || "All Time")}})`;
         }}
 
-        usageTotalsEl.innerHTML = `
-          <div class="usage-stat"><div class="k">Total Requests</div><div class="v">${{_fmtInt(totals.requests)}}</div></div>
-          <div class="usage-stat"><div class="k">Blocked</div><div class="v">${{_fmtInt(totals.blocked)}}</div></div>
-          <div class="usage-stat"><div class="k">Errors</div><div class="v">${{_fmtInt(totals.errors)}}</div></div>
-          <div class="usage-stat"><div class="k">Input Tokens</div><div class="v">${{_fmtInt(totals.input_tokens)}}</div></div>
-          <div class="usage-stat"><div class="k">Output Tokens</div><div class="v">${{_fmtInt(totals.output_tokens)}}</div></div>
-          <div class="usage-stat"><div class="k">Estimated Cost</div><div class="v">${{_fmtMoney(totals.estimated_cost_usd)}}</div></div>
-        `;
+        const totalsFrag = document.createDocumentFragment();
+        for (const [label, value] of [
+          ["Total Requests", _fmtInt(totals.requests)],
+          ["Blocked", _fmtInt(totals.blocked)],
+          ["Errors", _fmtInt(totals.errors)],
+          ["Input Tokens", _fmtInt(totals.input_tokens)],
+          ["Output Tokens", _fmtInt(totals.output_tokens)],
+          ["Estimated Cost", _fmtMoney(totals.estimated_cost_usd)],
+        ]) {{
+          const stat = document.createElement("div");
+          stat.className = "usage-stat";
+          const k = document.createElement("div");
+          k.className = "k";
+          k.textContent = label;
+          const v = document.createElement("div");
+          v.className = "v";
+          v.textContent = value;
+          stat.append(k, v);
+          totalsFrag.append(stat);
+        }}
+        usageTotalsEl.replaceChildren(totalsFrag);
 
         if (!summary.length) {{
           usageProviderRowsEl.innerHTML = `<tr><td colspan="7">No provider usage data yet.</td></tr>`;
         }} else {{
-          usageProviderRowsEl.innerHTML = summary.map((row) => `
-            <tr>
-              <td>${{escapeHtml(row.provider || "unknown")}}</td>
-              <td>${{_fmtInt(row.requests)}}</td>
-              <td>${{_fmtInt(row.blocked)}}</td>
-              <td>${{_fmtInt(row.errors)}}</td>
-              <td>${{_fmtInt(row.input_tokens)}}</td>
-              <td>${{_fmtInt(row.output_tokens)}}</td>
-              <td>${{_fmtMoney(row.estimated_cost_usd)}}</td>
-            </tr>
-          `).join("");
+          usageProviderRowsEl.replaceChildren(_usageTableRows(summary, (row) => [
+            String(row.provider || "unknown"),
+            _fmtInt(row.requests),
+            _fmtInt(row.blocked),
+            _fmtInt(row.errors),
+            _fmtInt(row.input_tokens),
+            _fmtInt(row.output_tokens),
+            _fmtMoney(row.estimated_cost_usd),
+          ]));
         }}
 
         if (!recent.length) {{
           usageRecentRowsEl.innerHTML = `<tr><td colspan="7">No recent requests yet.</td></tr>`;
         }} else {{
-          usageRecentRowsEl.innerHTML = recent.map((row) => `
-            <tr>
-              <td>${{escapeHtml(row.ts_utc || "")}}</td>
-              <td>${{escapeHtml(row.provider || "unknown")}}</td>
-              <td>${{_fmtInt(row.status_code)}}</td>
-              <td>${{row.blocked ? "Yes" : "No"}}</td>
-              <td>${{_fmtInt(row.input_tokens)}} / ${{_fmtInt(row.output_tokens)}}</td>
-              <td>${{_fmtMoney(row.estimated_cost_usd)}}</td>
-              <td class="pre">${{escapeHtml(row.prompt_preview || "")}}</td>
-            </tr>
-          `).join("");
+          usageRecentRowsEl.replaceChildren(_usageTableRows(recent, (row) => [
+            String(row.ts_utc || ""),
+            String(row.provider || "unknown"),
+            _fmtInt(row.status_code),
+            row.blocked ? "Yes" : "No",
+            `${{_fmtInt(row.input_tokens)}} / ${{_fmtInt(row.output_tokens)}}`,
+            _fmtMoney(row.estimated_cost_usd),
+            String(row.prompt_preview || ""),
+          ], "pre"));
         }}
 
         _renderUsageTimelineChart(timeline);
@@ -11099,9 +12078,8 @@ HTML = f"""<!doctype html>
       function resetFlowGraphView() {{
         if (!flowGraphState) return;
         if (flowGraphState.initialPositions) {{
-          flowGraphState.positions = new Map(
-            Array.from(flowGraphState.initialPositions.entries()).map(([k, v]) => [k, {{...v}}])
-          );
+          flowGraphState.positions = _copyFlowPositions(flowGraphState.initialPositions);
+          _markFlowGeometryChanged(flowGraphState);
         }}
         flowGraphState.scale = computeFlowGraphFitScale();
         drawFlowGraph();
@@ -11334,6 +12312,7 @@ HTML = f"""<!doctype html>
       function addTrace(entry) {{
         latestTraceEntry = entry;
         traceHistory.unshift(entry);
+        if (traceHistory.length > TRACE_HISTORY_LIMIT) traceHistory.length = TRACE_HISTORY_LIMIT;
         selectedTraceIndex = 0;
         traceCount += 1;
         setHttpTraceCount(traceCount);
@@ -11375,8 +12354,10 @@ HTML = f"""<!doctype html>
         if (entry.chatMode === "multi" && Array.isArray(entry.messages)) {{
           clientReq.payload.messages = entry.messages;
         }}
+        // Shallow copy: only the top-level trace/agent_trace fields are replaced below, and the
+        // result is only serialized for display.
         const responseBodyForDisplay = entry.body && typeof entry.body === "object"
-          ? JSON.parse(JSON.stringify(entry.body))
+          ? {{ ...entry.body }}
           : entry.body;
         if (responseBodyForDisplay && responseBodyForDisplay.trace && responseBodyForDisplay.trace.steps) {{
           responseBodyForDisplay.trace = {{
@@ -11453,6 +12434,7 @@ HTML = f"""<!doctype html>
       }}
 
       function resetTrace() {{
+        cancelTraceViewsRender();
         traceCount = 0;
         traceHistory = [];
         selectedTraceIndex = -1;
@@ -11766,46 +12748,90 @@ HTML = f"""<!doctype html>
         }}
       }}
 
-      function sendWebSocketChat(requestUrl, requestPayload) {{
+      function closeChatSocket() {{
+        if (chatSocketIdleTimer) {{
+          clearTimeout(chatSocketIdleTimer);
+          chatSocketIdleTimer = null;
+        }}
+        const socket = chatSocket;
+        chatSocket = null;
+        try {{ if (socket && socket.readyState <= WebSocket.OPEN) socket.close(); }} catch {{}}
+      }}
+
+      function _sendOnChatSocket(requestUrl, requestPayload, reuse) {{
         return new Promise((resolve, reject) => {{
           let settled = false;
-          let socket;
-          const finish = (fn, value) => {{
-            if (settled) return;
-            settled = true;
-            try {{ if (socket && socket.readyState === WebSocket.OPEN) socket.close(); }} catch {{}}
-            fn(value);
-          }};
-          try {{
-            socket = new WebSocket(requestUrl);
-          }} catch (err) {{
-            reject(err);
-            return;
-          }}
-          const timer = setTimeout(() => finish(reject, new Error("WebSocket request timed out")), CHAT_REQUEST_TIMEOUT_MS);
-          socket.addEventListener("open", () => {{
-            socket.send(JSON.stringify(requestPayload));
-          }});
-          socket.addEventListener("message", (event) => {{
-            clearTimeout(timer);
+          let socket = reuse ? chatSocket : null;
+          const onOpen = () => socket.send(JSON.stringify(requestPayload));
+          const onMessage = (event) => {{
             try {{
               const payload = JSON.parse(String(event.data || "{{}}"));
               payload.protocol_events = [
-                {{ event: "websocket_open", transport: "websocket" }},
+                {{ event: reuse ? "websocket_reuse" : "websocket_open", transport: "websocket" }},
                 {{ event: "websocket_message", payload_summary: {{ has_response: payload.response != null, has_error: payload.error != null, trace_id: payload.trace_id || "" }} }}
               ];
-              finish(resolve, payload);
+              finish(resolve, payload, true);
             }} catch (err) {{
-              finish(reject, err);
+              finish(reject, err, false);
             }}
-          }});
-          socket.addEventListener("error", () => {{
+          }};
+          const onFail = () => finish(reject, new Error("WebSocket request failed"), false);
+          const finish = (fn, value, keepOpen) => {{
+            if (settled) return;
+            settled = true;
             clearTimeout(timer);
-            finish(reject, new Error("WebSocket request failed"));
-          }});
+            socket.removeEventListener("open", onOpen);
+            socket.removeEventListener("message", onMessage);
+            socket.removeEventListener("error", onFail);
+            socket.removeEventListener("close", onFail);
+            if (keepOpen) {{
+              chatSocketIdleTimer = setTimeout(closeChatSocket, CHAT_SOCKET_IDLE_MS);
+            }} else {{
+              closeChatSocket();
+            }}
+            fn(value);
+          }};
+          if (!socket) {{
+            try {{
+              socket = new WebSocket(requestUrl);
+            }} catch (err) {{
+              reject(err);
+              return;
+            }}
+            chatSocket = socket;
+          }}
+          const timer = setTimeout(() => finish(reject, new Error("WebSocket request timed out"), false), CHAT_REQUEST_TIMEOUT_MS);
+          socket.addEventListener("message", onMessage);
+          socket.addEventListener("error", onFail);
+          socket.addEventListener("close", onFail);
+          if (reuse) {{
+            socket.send(JSON.stringify(requestPayload));
+          }} else {{
+            socket.addEventListener("open", onOpen);
+          }}
         }});
       }}
 
+      async function sendWebSocketChat(requestUrl, requestPayload) {{
+        // Consecutive turns (e.g. preset sequences) reuse the open socket instead of
+        // reconnecting; the socket is closed after CHAT_SOCKET_IDLE_MS without traffic.
+        if (chatSocketIdleTimer) {{
+          clearTimeout(chatSocketIdleTimer);
+          chatSocketIdleTimer = null;
+        }}
+        const canReuse = !!(chatSocket && chatSocket.readyState === WebSocket.OPEN && chatSocket.url === requestUrl);
+        if (!canReuse) {{
+          closeChatSocket();
+          return await _sendOnChatSocket(requestUrl, requestPayload, false);
+        }}
+        try {{
+          return await _sendOnChatSocket(requestUrl, requestPayload, true);
+        }} catch (err) {{
+          if (String(err?.message || "").includes("timed out")) throw err;
+          return await _sendOnChatSocket(requestUrl, requestPayload, false);
+        }}
+      }}
+
       async function sendPrompt() {{
         const prompt = promptEl.value.trim();
         if (!prompt) {{
@@ -11878,7 +12904,7 @@ HTML = f"""<!doctype html>
             streamedAssistantText += delta;
             pendingAssistantText = streamedAssistantText;
             statusEl.textContent = `Streaming response... (${{streamedAssistantText.length}} chars)`;
-            renderConversation();
+            renderPendingRow();
           }};
           let data;
           let responseStatus = 200;
@@ -12039,10 +13065,7 @@ HTML = f"""<!doctype html>
         const text = logListEl.innerText || "";
         try {{
           await navigator.clipboard.writeText(text);
-          statusEl.textContent = "Trace copied";
-          setTimeout(() => {{
-            if (statusEl.textContent === "Trace copied") statusEl.textContent = "Idle";
-          }}, 1200);
+          _flashStatus("Trace copied");
         }} catch {{
           statusEl.textContent = "Copy failed";
         }}
@@ -12258,6 +13281,7 @@ HTML = f"""<!doctype html>
         }}
         if (!e.target.closest(".settings-model-dropdown")) _closeModelDropdowns();
       }});
+      _bindFlowGraphEvents();
       flowZoomInBtn.addEventListener("click", () => flowZoomBy(1.15));
       flowZoomOutBtn.addEventListener("click", () => flowZoomBy(1 / 1.15));
       flowZoomResetBtn.addEventListener("click", () => resetFlowGraphView());
@@ -12369,7 +13393,18 @@ HTML = f"""<!doctype html>
       presetConfigModalEl.addEventListener("click", (e) => {{
         if (e.target === presetConfigModalEl) closePresetConfigModal();
       }});
+      presetGroupsEl.addEventListener("toggle", (e) => {{
+        const details = e.target;
+        if (!details || !details.open || !details.classList || !details.classList.contains("preset-group-card")) return;
+        hydratePresetGroup(details.querySelector(".preset-grid"));
+      }}, true);
       presetGroupsEl.addEventListener("click", (e) => {{
+        const groupSummary = e.target.closest(".preset-group-summary");
+        if (groupSummary) {{
+          // Fill the grid before the <details> opens so the first frame is not empty.
+          hydratePresetGroup(groupSummary.parentElement.querySelector(".preset-grid"));
+          return;
+        }}
         const attachBtn = e.target.closest("[data-preset-attach]");
         if (attachBtn) {{
           const gi = Number(attachBtn.dataset.groupIndex || "-1");
@@ -12421,12 +13456,7 @@ HTML = f"""<!doctype html>
         refreshCurrentModelText();
         refreshProviderValidationText();
         syncZscalerProxyModeState();
-        syncOllamaStatusVisibility();
-        refreshOllamaStatus();
-        syncLiteLlmStatusVisibility();
-        refreshLiteLlmStatus();
-        syncAwsAuthStatusVisibility();
-        refreshAwsAuthStatus();
+        refreshProviderStatuses();
         renderCodeViewer();
         maybeShowPlannedFlowPreview();
       }});
@@ -12654,7 +13684,7 @@ HTML = f"""<!doctype html>
           restartConfirmCancelBtnEl.click();
           return;
         }}
-        if (e.key === "Escape" && flowExplainModalEl.classList.contains("open")) {{
+        if (e.key === "Escape" && flowExplainOpen) {{
           closeFlowExplainModal();
           return;
         }}
@@ -12733,16 +13763,11 @@ HTML = f"""<!doctype html>
       showPlannedFlowPreview();
       refreshMcpStatus();
       mcpStatusTimer = setInterval(refreshMcpStatus, 60000);
-      syncOllamaStatusVisibility();
-      refreshOllamaStatus();
+      refreshProviderStatuses();
       ollamaStatusTimer = setInterval(refreshOllamaStatus, 60000);
-      syncLiteLlmStatusVisibility();
-      refreshLiteLlmStatus();
       liteLlmStatusTimer = setInterval(refreshLiteLlmStatus, 60000);
       refreshUpdateStatus();
       _scheduleUpdateStatusPolling(updateCheckIntervalSeconds);
-      syncAwsAuthStatusVisibility();
-      refreshAwsAuthStatus();
       resetAgentTrace();
       resetInspector();
       renderCodeViewer();
@@ -13177,14 +14202,24 @@ def _resolve_preset_attachment_path(rel_path: str) -> Path:
     return candidate
 
 
+def _read_preset_attachment_image(sample_path: Path) -> tuple[bytes, str] | None:
+    ext = sample_path.suffix.lower()
+    mime = mimetypes.guess_type(sample_path.name)[0] or "application/octet-stream"
+    if ext not in _PRESET_ATTACHMENT_IMAGE_EXTS and not mime.startswith("image/"):
+        return None
+    raw = sample_path.read_bytes()
+    if len(raw) > _PRESET_ATTACHMENT_MAX_BINARY_BYTES:
+        raise ValueError("Sample image is too large.")
+    return raw, mime
+
+
 def _build_preset_attachment_payload(rel_path: str) -> dict[str, object]:
     sample_path = _resolve_preset_attachment_path(rel_path)
     ext = sample_path.suffix.lower()
     mime = mimetypes.guess_type(sample_path.name)[0] or "application/octet-stream"
-    if ext in _PRESET_ATTACHMENT_IMAGE_EXTS or mime.startswith("image/"):
-        raw = sample_path.read_bytes()
-        if len(raw) > _PRESET_ATTACHMENT_MAX_BINARY_BYTES:
-            raise ValueError("Sample image is too large.")
+    image = _read_preset_attachment_image(sample_path)
+    if image is not None:
+        raw, mime = image
         encoded = base64.b64encode(raw).decode("ascii")
         return {
             "kind": "image",
@@ -14219,6 +15254,15 @@ class Handler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_binary(self, body: bytes, content_type: str, status: int = 200, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
     def _send_html(self, html: str, status: int = 200) -> None:
         body = html.encode("utf-8")
         self.send_response(status)
@@ -14291,34 +15335,58 @@ class Handler(BaseHTTPRequestHandler):
         self.send_header("Connection", "Upgrade")
         self.send_header("Sec-WebSocket-Accept", _ws_accept_key(client_key))
         self.end_headers()
-        try:
-            opcode, raw_payload = _ws_decode_frame(self.rfile)
+        self.close_connection = True
+        # Keep the socket open between turns so multi-step sequences reuse one
+        # connection; idle clients are dropped after CHAT_WS_IDLE_TIMEOUT_SECONDS.
+        self.connection.settimeout(CHAT_WS_IDLE_TIMEOUT_SECONDS)
+        ip = _client_ip(self) or "unknown"
+        first_message = True
+        while True:
+            try:
+                opcode, raw_payload = _ws_decode_frame(self.rfile)
+            except Exception:
+                break
             if opcode == 0x8:
+                break
+            if opcode == 0x9:
+                self.wfile.write(_ws_encode_frame(raw_payload, opcode=0xA))
+                continue
+            if opcode == 0xA:
+                continue
+            try:
+                if opcode not in {0x1, 0x2}:
+                    raise ValueError("unsupported websocket opcode")
+                if not first_message:
+                    ok, retry_after = _rate_limit_take(f"chat:{ip}", APP_RATE_LIMIT_CHAT_PER_MIN)
+                    if not ok:
+                        raise ValueError(f"Rate limit exceeded. Retry after {max(1, int(retry_after))}s.")
+                first_message = False
+                request_payload = json.loads(raw_payload.decode("utf-8") or "{}")
+                if not isinstance(request_payload, dict):
+                    raise ValueError("websocket payload must be a JSON object")
+                response_payload, status = self._call_chat_json_internal(
+                    request_payload,
+                    demo_user=str(self.headers.get("X-Demo-User") or "").strip(),
+                    response_mode="standard",
+                )
+                response_payload = dict(response_payload)
+                response_payload.setdefault(
+                    "protocol",
+                    {
+                        "mode": "websocket",
+                        "label": "WebSocket",
+                        "provider": str(request_payload.get("provider") or "unknown"),
+                        "note": "Browser-to-app chat request and response used a real WebSocket connection. Provider and guardrail calls still use the configured app-side path.",
+                    },
+                )
+                response_payload["protocol_transport_status"] = status
+            except Exception as exc:
+                response_payload = {"error": "WebSocket chat failed.", "details": str(exc)}
+            try:
+                self.wfile.write(_ws_encode_frame(json.dumps(response_payload).encode("utf-8"), opcode=0x1))
+                self.wfile.flush()
+            except Exception:
                 return
-            if opcode not in {0x1, 0x2}:
-                raise ValueError("unsupported websocket opcode")
-            request_payload = json.loads(raw_payload.decode("utf-8") or "{}")
-            if not isinstance(request_payload, dict):
-                raise ValueError("websocket payload must be a JSON object")
-            response_payload, status = self._call_chat_json_internal(
-                request_payload,
-                demo_user=str(self.headers.get("X-Demo-User") or "").strip(),
-                response_mode="standard",
-            )
-            response_payload = dict(response_payload)
-            response_payload.setdefault(
-                "protocol",
-                {
-                    "mode": "websocket",
-                    "label": "WebSocket",
-                    "provider": str(request_payload.get("provider") or "unknown"),
-                    "note": "Browser-to-app chat request and response used a real WebSocket connection. Provider and guardrail calls still use the configured app-side path.",
-                },
-            )
-            response_payload["protocol_transport_status"] = status
-        except Exception as exc:
-            response_payload = {"error": "WebSocket chat failed.", "details": str(exc)}
-        self.wfile.write(_ws_encode_frame(json.dumps(response_payload).encode("utf-8"), opcode=0x1))
         try:
             self.wfile.write(_ws_encode_frame(b"", opcode=0x8))
             self.wfile.flush()
@@ -14374,7 +15442,21 @@ class Handler(BaseHTTPRequestHandler):
                 return
             params = urlparse.parse_qs(parsed_path.query or "", keep_blank_values=False)
             rel_path = str((params.get("path") or [""])[0] or "").strip()
+            want_binary = str((params.get("format") or [""])[0] or "").strip().lower() == "binary"
             try:
+                if want_binary:
+                    # Images go out as raw bytes (no base64/JSON inflation); text
+                    # samples still use the JSON payload below.
+                    sample_path = _resolve_preset_attachment_path(rel_path)
+                    image = _read_preset_attachment_image(sample_path)
+                    if image is not None:
+                        raw, mime = image
+                        self._send_binary(
+                            raw,
+                            mime,
+                            headers={"X-Attachment-Name": urlparse.quote(sample_path.name, safe="")},
+                        )
+                        return
                 attachment = _build_preset_attachment_payload(rel_path)
                 self._send_json(
                     {